@@ -200,11 +200,64 @@ __license__ = "LGPL-3.0"
 __version__ = "0.2.1"
 
 # global classes and functions
-from .seq_re_main import SeqRegex
+from .seq_re_main import SeqRegex, CompiledSeqPattern, CompiledSeqTemplate
+from .seq_re_set import PatternSet
+from .seq_re_encode import BatchEncoder
+from .seq_re_parallel import parallel_finditer
+from .seq_re_corpus import CorpusReader
+from .seq_re_binary import BinaryCorpus, Vocabulary, compile_corpus
+from .seq_re_index import CorpusIndex, build_index
+from .seq_re_stream import finditer_stream
 from .seq_re_bootstrap import bootstrap
+from .seq_re_cache import purge, cache_info, set_cache_size
 
 SeqRegex = SeqRegex
 """Wrapper namespace of SeqRegex in `seq_re_main <seq_re_main.html>`_ module."""
 
+CompiledSeqPattern = CompiledSeqPattern
+"""Wrapper namespace of CompiledSeqPattern in `seq_re_main <seq_re_main.html>`_ module."""
+
+CompiledSeqTemplate = CompiledSeqTemplate
+"""Wrapper namespace of CompiledSeqTemplate in `seq_re_main <seq_re_main.html>`_ module."""
+
+PatternSet = PatternSet
+"""Wrapper namespace of PatternSet in `seq_re_set <seq_re_set.html>`_ module."""
+
+BatchEncoder = BatchEncoder
+"""Wrapper namespace of BatchEncoder in `seq_re_encode <seq_re_encode.html>`_ module."""
+
+parallel_finditer = parallel_finditer
+"""Wrapper namespace of parallel_finditer() in `seq_re_parallel <seq_re_parallel.html>`_ module"""
+
+CorpusReader = CorpusReader
+"""Wrapper namespace of CorpusReader in `seq_re_corpus <seq_re_corpus.html>`_ module."""
+
+BinaryCorpus = BinaryCorpus
+"""Wrapper namespace of BinaryCorpus in `seq_re_binary <seq_re_binary.html>`_ module."""
+
+Vocabulary = Vocabulary
+"""Wrapper namespace of Vocabulary in `seq_re_binary <seq_re_binary.html>`_ module."""
+
+compile_corpus = compile_corpus
+"""Wrapper namespace of compile_corpus() in `seq_re_binary <seq_re_binary.html>`_ module"""
+
+CorpusIndex = CorpusIndex
+"""Wrapper namespace of CorpusIndex in `seq_re_index <seq_re_index.html>`_ module."""
+
+build_index = build_index
+"""Wrapper namespace of build_index() in `seq_re_index <seq_re_index.html>`_ module"""
+
+finditer_stream = finditer_stream
+"""Wrapper namespace of finditer_stream() in `seq_re_stream <seq_re_stream.html>`_ module"""
+
 bootstrap = bootstrap
 """Wrapper namespace of bootstrap() in `seq_re_bootstrap <seq_re_bootstrap.html>`_ module"""
+
+purge = purge
+"""Wrapper namespace of purge() in `seq_re_cache <seq_re_cache.html>`_ module"""
+
+cache_info = cache_info
+"""Wrapper namespace of cache_info() in `seq_re_cache <seq_re_cache.html>`_ module"""
+
+set_cache_size = set_cache_size
+"""Wrapper namespace of set_cache_size() in `seq_re_cache <seq_re_cache.html>`_ module"""
@@ -0,0 +1,438 @@
+# coding:utf-8
+
+"""
+Pre-encoded binary corpus
+=========================
+
+Matching a corpus encodes every element of every tuple by a lookup of the string
+in the encoding dict of the pattern, which is repeated for each pattern run over the corpus.
+compile_corpus() interns every element into a persistent vocabulary once,
+and writes the sequences as packed integer arrays into a directory:
+
+- ``vocabulary.json``: the strings, in which the index of a string is its id;
+- ``tokens.bin``: the ids of the elements of all tuples, little-endian uint32,
+  row by row of ``len_tuple`` columns;
+- ``offsets.bin``: the index of the first tuple of each sequence, little-endian uint64,
+  followed by the total number of tuples;
+- ``meta.json``: the length of the tuple and the sizes.
+
+BinaryCorpus maps the files into memory, by ``numpy.memmap`` if NumPy is installed,
+or by ``mmap`` otherwise. A compiled pattern is run over it by translating
+the encoding dict of the pattern into a table indexed by the ids,
+which costs one lookup in the vocabulary per literal of the pattern,
+and then the tuples are encoded by indexing the table without hashing any string.
+
+>>> import seq_re
+>>> corpus = seq_re.compile_corpus(seq_re.CorpusReader('corpus.txt', 2), 'corpus.bin', 2)
+>>> compiled = seq_re.SeqRegex(2).compile('[;nc] .{0,3} [保荐|担任]')
+>>> for sequence_index, match in corpus.finditer(compiled):
+>>>     print(sequence_index, match.span())
+
+A vocabulary can be shared by the corpora compiled one after another::
+
+    vocabulary = seq_re.Vocabulary.load('corpus.bin/vocabulary.json')
+    seq_re.compile_corpus(sequences, 'another.bin', 2, vocabulary)
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import io
+import json
+import mmap
+import os
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import seq_re_main
+from . import seq_re_parse as sp
+
+VOCABULARY_FILE = 'vocabulary.json'
+TOKENS_FILE = 'tokens.bin'
+OFFSETS_FILE = 'offsets.bin'
+META_FILE = 'meta.json'
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _dump_json(obj, path):
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(seq_re_main.unicode_str(json.dumps(obj)))
+
+
+def _load_json(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return json.loads(f.read())
+
+
+class Vocabulary(object):
+    """The class interns the strings into the consecutive ids from 0."""
+
+    def __init__(self, strings=()):
+        """Initialize a Vocabulary instance.
+
+        :param strings: The strings in the order of their ids
+        """
+        self._strings = []
+        self._ids = dict()
+        for string in strings:
+            self.intern(string)
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __contains__(self, string):
+        return string in self._ids
+
+    def intern(self, string):
+        """Get the id of a string, which is added if missing.
+
+        :param string: The string
+        :return: The id
+        """
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._ids[string] = string_id
+            self._strings.append(string)
+        return string_id
+
+    def get(self, string):
+        """Get the id of a string.
+
+        :param string: The string
+        :return: The id, or None if missing
+        """
+        return self._ids.get(string)
+
+    def string(self, string_id):
+        """Get the string of an id.
+
+        :param string_id: The id
+        :return: The string
+        """
+        return self._strings[string_id]
+
+    def save(self, path):
+        """Write the vocabulary into a JSON file.
+
+        :param path: The path of the file
+        """
+        _dump_json(self._strings, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read the vocabulary from a JSON file written by save().
+
+        :param path: The path of the file
+        :return: A Vocabulary instance
+        """
+        return cls(_load_json(path))
+
+
+def compile_corpus(sequences, path, len_tuple, vocabulary=None):
+    """Intern the elements of the sequences, and write them as a binary corpus.
+
+    :param sequences: An iterable of 2-dimensional Sequences (or the sequences of tuples)
+    :param path: The path of the directory of the binary corpus, which is created if missing
+    :param len_tuple: The length of the tuple
+    :param vocabulary: The Vocabulary extended by the corpus, or None for a new one
+    :return: A BinaryCorpus instance
+    """
+    if vocabulary is None:
+        vocabulary = Vocabulary()
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    intern = vocabulary.intern
+    count_sequences = 0
+    count_tuples = 0
+    with open(os.path.join(path, TOKENS_FILE), 'wb') as tokens_file, \
+            open(os.path.join(path, OFFSETS_FILE), 'wb') as offsets_file:
+        for sequence in sequences:
+            ids = []
+            for n_tuple in sequence:
+                if len(n_tuple) != len_tuple:
+                    raise ValueError('inconsistent length of the tuple in sequence %d'
+                                     % count_sequences)
+                ids.extend(intern(element) for element in n_tuple)
+            offsets_file.write(struct.pack('<Q', count_tuples))
+            tokens_file.write(struct.pack('<%dI' % len(ids), *ids))
+            count_sequences += 1
+            count_tuples += len(sequence)
+        offsets_file.write(struct.pack('<Q', count_tuples))
+    vocabulary.save(os.path.join(path, VOCABULARY_FILE))
+    _dump_json({'len_tuple': len_tuple, 'sequences': count_sequences, 'tuples': count_tuples},
+               os.path.join(path, META_FILE))
+    return BinaryCorpus(path)
+
+
+def _map_array(path, dtype, length, use_numpy):
+    """Map an array file into memory.
+
+    :param path: The path of the file
+    :param dtype: The NumPy dtype of the array
+    :param length: The number of items in the array
+    :param use_numpy: Whether to map by numpy.memmap
+    :return: (a numpy.memmap or the buffer of bytes, the mmap object to close or None)
+    """
+    if length == 0:
+        # an empty file cannot be mapped
+        return (numpy.zeros(0, dtype=dtype) if use_numpy else b''), None
+    if use_numpy:
+        return numpy.memmap(path, dtype=dtype, mode='r', shape=(length,)), None
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, mapped
+
+
+class _SequenceView(object):
+    """A sequence of the binary corpus, whose tuples are decoded on demand."""
+
+    __slots__ = ('_corpus', '_start', '_length')
+
+    def __init__(self, corpus, start, length):
+        self._corpus = corpus
+        self._start = start
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        # noinspection PyProtectedMember
+        decode = self._corpus._decode_tuples
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return decode(self._start, self._start + self._length)[index]
+            return decode(self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('tuple index out of range')
+        return decode(self._start + index, self._start + index + 1)[0]
+
+
+class BinaryCorpus(object):
+    """The class reads a binary corpus written by compile_corpus()."""
+
+    def __init__(self, path, use_numpy=None):
+        """Initialize a BinaryCorpus instance.
+
+        :param path: The path of the directory of the binary corpus
+        :param use_numpy: Whether to map the arrays by NumPy, or None to use it if installed
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ImportError('NumPy is required by numpy.memmap')
+        meta = _load_json(os.path.join(path, META_FILE))
+        self._path = path
+        self._len_tuple = meta['len_tuple']
+        self._count = meta['sequences']
+        self._vocabulary = Vocabulary.load(os.path.join(path, VOCABULARY_FILE))
+        self._use_numpy = use_numpy
+        self._files = []
+        self._tokens = self._map(TOKENS_FILE, '<u4', meta['tuples'] * self._len_tuple)
+        self._offsets = self._map(OFFSETS_FILE, '<u8', self._count + 1)
+        if use_numpy:
+            self._tokens = self._tokens.reshape(-1, self._len_tuple)
+
+    def _map(self, filename, dtype, length):
+        """Map an array file of the corpus into memory."""
+        array, mapped = _map_array(os.path.join(self._path, filename), dtype, length,
+                                   self._use_numpy)
+        if mapped is not None:
+            self._files.append(mapped)
+        return array
+
+    def close(self):
+        """Release the memory-mapped files."""
+        for mapped in self._files:
+            mapped.close()
+        self._files = []
+        self._tokens = self._offsets = None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for sequence_index in range(self._count):
+            yield self[sequence_index]
+
+    def __getitem__(self, sequence_index):
+        """Decode a sequence.
+
+        :param sequence_index: The index of the sequence
+        :return: [[element, ...], ...]
+        """
+        if sequence_index < 0:
+            sequence_index += self._count
+        if not 0 <= sequence_index < self._count:
+            raise IndexError('sequence index out of range')
+        return self._decode_tuples(self._offset(sequence_index), self._offset(sequence_index + 1))
+
+    @property
+    def path(self):
+        """The path of the directory of the binary corpus"""
+        return self._path
+
+    @property
+    def len_tuple(self):
+        """The length of the tuple"""
+        return self._len_tuple
+
+    @property
+    def use_numpy(self):
+        """Whether the arrays are mapped by NumPy"""
+        return self._use_numpy
+
+    @property
+    def vocabulary(self):
+        """The Vocabulary of the corpus"""
+        return self._vocabulary
+
+    def _offset(self, sequence_index):
+        """Get the index of the first tuple of a sequence."""
+        if self._use_numpy:
+            return int(self._offsets[sequence_index])
+        return struct.unpack_from('<Q', self._offsets, sequence_index * 8)[0]
+
+    def _ids(self, start, end):
+        """Get the ids of the elements of the tuples in [start, end), row by row."""
+        if self._use_numpy:
+            return self._tokens[start:end]
+        len_tuple = self._len_tuple
+        count = (end - start) * len_tuple
+        return struct.unpack_from('<%dI' % count, self._tokens, start * len_tuple * 4)
+
+    def _decode_tuples(self, start, end):
+        """Decode the tuples in [start, end) into strings."""
+        strings = self._vocabulary.string
+        if self._use_numpy:
+            return [[strings(string_id) for string_id in row.tolist()]
+                    for row in self._ids(start, end)]
+        ids = self._ids(start, end)
+        len_tuple = self._len_tuple
+        return [[strings(string_id) for string_id in ids[i:i + len_tuple]]
+                for i in range(0, len(ids), len_tuple)]
+
+    def _encode_table(self, compiled):
+        """Translate the encoding dict of a compiled pattern into a table indexed by the ids.
+
+        Only the literals of the pattern are looked up, and the other ids are encoded into `.`.
+
+        :param compiled: The CompiledSeqPattern object
+        :return: A dict {id: char}, or an array of code points if use NumPy
+        """
+        if self._use_numpy:
+            table = numpy.full(len(self._vocabulary), ord('.'), dtype='<u4')
+        else:
+            table = dict()
+        # noinspection PyProtectedMember
+        for string, char in compiled._map_encode.items():
+            string_id = self._vocabulary.get(string)
+            if string_id is not None:
+                table[string_id] = ord(char) if self._use_numpy else char
+        return table
+
+    def _encode_batch(self, compiled, table, start, end):
+        """Encode the tuples in [start, end) into one linear string for the compiled pattern."""
+        # noinspection PyProtectedMember
+        sentinel = compiled._sentinel
+        columns = compiled.columns
+        ids = self._ids(start, end)
+        if self._use_numpy:
+            # noinspection PyProtectedMember
+            buffer = numpy.empty((end - start, compiled._stride), dtype='<u4')
+            if sentinel:
+                buffer[:, 0] = ord(sentinel)
+            buffer[:, len(sentinel):] = table[ids[:, list(columns)]]
+            return buffer.tobytes().decode('utf-32-le')
+        len_tuple = self._len_tuple
+        table_get = table.get
+        stack_encoded = []
+        for i in range(0, len(ids), len_tuple):
+            stack_encoded.append(sentinel)
+            for column in columns:
+                stack_encoded.append(table_get(ids[i + column], '.'))
+        return ''.join(stack_encoded)
+
+    def encode(self, compiled, batch_size=DEFAULT_BATCH_SIZE, sequence_indices=None):
+        """Encode each sequence into the linear string for matching the compiled pattern,
+        in which the sequences are encoded batch by batch.
+
+        :param compiled: The CompiledSeqPattern object
+        :param batch_size: The number of sequences encoded at a time
+        :param sequence_indices: The indices of the sequences encoded one by one,
+                                 or None for all sequences
+        :return: An iterator which generates (sequence_index, the encoded string)
+        """
+        table = self._encode_table(compiled)
+        if sequence_indices is not None:
+            for sequence_index in sequence_indices:
+                yield sequence_index, self._encode_batch(compiled, table,
+                                                         self._offset(sequence_index),
+                                                         self._offset(sequence_index + 1))
+            return
+        # noinspection PyProtectedMember
+        stride = compiled._stride
+        for first in range(0, self._count, batch_size):
+            last = min(first + batch_size, self._count)
+            batch_start = self._offset(first)
+            encoded = self._encode_batch(compiled, table, batch_start, self._offset(last))
+            start = batch_start
+            for sequence_index in range(first, last):
+                end = self._offset(sequence_index + 1)
+                yield sequence_index, encoded[(start - batch_start) * stride:
+                                              (end - batch_start) * stride]
+                start = end
+
+    def finditer(self, compiled, batch_size=DEFAULT_BATCH_SIZE, sequence_indices=None):
+        """
+        Return an iterator yielding (sequence_index, SeqMatchObject)
+        over all non-overlapping matches in each sequence of the corpus,
+        the same as CompiledSeqPattern.finditer_many() over the decoded sequences.
+
+        The tuples of a match are decoded only when its groups are read.
+
+        :param compiled: The CompiledSeqPattern object
+        :param batch_size: The number of sequences encoded at a time
+        :param sequence_indices: The indices of the sequences matched, or None for all sequences
+        :return: An iterator which generates (sequence_index, SeqMatchObject Instance)
+        """
+        if compiled.len_tuple != self._len_tuple:
+            raise ValueError('inconsistent length of the tuple')
+        regex_finditer = compiled.regex.finditer
+        # noinspection PyProtectedMember
+        match_object = compiled._match_object
+        formula = compiled.literal_formula
+        if formula == sp.Formula.TRUE:
+            formula = None
+        else:
+            # noinspection PyProtectedMember
+            formula = sp.Formula.translate(formula, compiled._map_encode)
+        # noinspection PyProtectedMember
+        stride = compiled._stride
+        min_width = compiled.min_width
+        if sequence_indices is not None and min_width > 0:
+            # the sequences too short to match are not encoded
+            sequence_indices = [sequence_index for sequence_index in sequence_indices
+                                if self._offset(sequence_index + 1) -
+                                self._offset(sequence_index) >= min_width]
+        min_length = min_width * stride
+        for sequence_index, encoded in self.encode(compiled, batch_size, sequence_indices):
+            if len(encoded) < min_length:
+                continue
+            # noinspection PyProtectedMember
+            if formula is None or seq_re_main._contains(formula, encoded):
+                sequence = _SequenceView(self, self._offset(sequence_index), len(encoded) // stride)
+                for match in regex_finditer(encoded):
+                    yield sequence_index, match_object(match, sequence)
@@ -42,25 +42,77 @@ __copyright__ = "Copyright (C) 2017 GE Ning"
 __license__ = "LGPL-3.0"
 __version__ = "1.0"
 
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+
+from . import seq_re_counter
 from . import seq_re_main
+from . import seq_re_parallel
+from . import seq_re_parse
+
+DEFAULT_CHUNKSIZE = 1000
 
 
 def _prepare(len_tuple, pattern, trigger_dict_list):
-    """Initialize a list of SeqRegexObject."""
-    seq_re_list = []
+    """Compile the trigger pattern once, and bind it with each trigger dict.
+
+    :return: (the list of CompiledSeqPattern,
+              {literal: [the index of trigger which requires the literal, ...]},
+              in which the literals are the values of a placeholder required if any,
+              [the index of trigger without required literals, ...])
+    """
+    names = set()
     for trigger_dict in trigger_dict_list:
-        sr = seq_re_main.SeqRegex(len_tuple).compile(pattern, **trigger_dict)
+        names.update(trigger_dict)
+    template = seq_re_main.SeqRegex(len_tuple).compile_template(pattern, *sorted(names))
+    # the literal sets required by any match, which consist of the placeholders only,
+    # so that the triggers are routed by their own values, not by the literals shared by all
+    # noinspection PyProtectedMember
+    placeholder_sets = [literal_set for literal_set
+                        in seq_re_parse.Formula.required(template._compiled.literal_formula)
+                        if literal_set <= names]
+    seq_re_list = []
+    index = dict()
+    unindexed = []
+    for i, trigger_dict in enumerate(trigger_dict_list):
+        sr = template.bind(**trigger_dict)
         seq_re_list.append(sr)
-    return seq_re_list
+        literals = None
+        for literal_set in placeholder_sets:
+            values = set()
+            for name in literal_set:
+                # an unbound placeholder is a literal itself
+                values.update(seq_re_parse.placeholder_values(trigger_dict[name])
+                              if name in trigger_dict else [name])
+            if values and (literals is None or len(values) < len(literals)):
+                literals = values
+        if literals is None:
+            literals = seq_re_parse.Formula.cover(sr.literal_formula)
+        if literals is not None:
+            for literal in literals:
+                index.setdefault(literal, []).append(i)
+        else:
+            unindexed.append(i)
+    return seq_re_list, index, unindexed
 
 
-def _generate(seq_re_list, sequence):
+def _generate(prepared, sequence):
     """Find matches in the sequence by the useful SeqRegexObject,
     and generate the result pattern."""
+    seq_re_list, index, unindexed = prepared
     # prune: no need to use the re module
+    # route the sequence to the triggers whose values occur in it
+    tokens = seq_re_main.token_set(sequence)
+    candidates = set(unindexed)
+    for token in tokens:
+        if token in index:
+            candidates.update(index[token])
     seq_re_used_indices = []
-    for i, sr in enumerate(seq_re_list):
-        if not sr.is_useless_for(sequence):
+    for i in sorted(candidates):
+        if not seq_re_list[i].is_useless_for(tokens):
             seq_re_used_indices.append(i)
     # match
     for sr_i in seq_re_used_indices:
@@ -74,22 +126,157 @@ def _generate(seq_re_list, sequence):
             yield ''.join(generated_pattern)
 
 
-def bootstrap(len_tuple, trigger_pattern, trigger_dict_list, sequences_iter):
+def _count_shard(shard, prepared=None):
+    """Count the patterns generated from a shard of sequences.
+
+    :param shard: (the index of the first sequence, [sequence, ...])
+    :param prepared: The trigger patterns returned by _prepare(), or None to use the ones of worker
+    :return: (the number of sequences, [(pattern_generated, freq), ...]),
+             in which the patterns are in the order they are generated first
+    """
+    if prepared is None:
+        prepared = _worker_prepared
+    counter = seq_re_counter.ExactCounter()
+    for seq in shard[1]:
+        for gen_pattern in _generate(prepared, seq):
+            counter.add(gen_pattern)
+    return len(shard[1]), counter.items()
+
+
+_worker_prepared = None  # the trigger patterns of the worker process
+
+
+def _init_worker(len_tuple, pattern, trigger_dict_list):
+    """Compile the trigger patterns in the worker process."""
+    global _worker_prepared
+    _worker_prepared = _prepare(len_tuple, pattern, trigger_dict_list)
+
+
+def _fingerprint(len_tuple, trigger_pattern, trigger_dict_list, capacity):
+    """Make the fingerprint of the trigger setup, which a checkpoint belongs to."""
+    def canonical(value):
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        elif isinstance(value, (list, tuple)):
+            return list(value)
+        else:
+            return value
+
+    setup = [len_tuple, trigger_pattern,
+             [sorted([name, canonical(value)] for name, value in trigger_dict.items())
+              for trigger_dict in trigger_dict_list],
+             capacity]
+    return hashlib.sha1(json.dumps(setup, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_checkpoint(path, fingerprint):
+    """Load the checkpoint if it exists.
+
+    :return: {'fingerprint': str, 'consumed': int, 'counter': state of counter} or None
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('fingerprint') != fingerprint:
+        raise ValueError('the checkpoint `%s` belongs to another trigger setup' % path)
+    return checkpoint
+
+
+def _save_checkpoint(path, fingerprint, consumed, counter):
+    """Save the checkpoint atomically by renaming a temporary file."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'consumed': consumed,
+                   'counter': counter.get_state()}, f)
+    getattr(os, 'replace', os.rename)(temp_path, path)
+
+
+def _crossed(consumed, shard_size, interval):
+    """Check whether a multiple of the interval is crossed by the last shard."""
+    return bool(interval) and consumed // interval > (consumed - shard_size) // interval
+
+
+def bootstrap(len_tuple, trigger_pattern, trigger_dict_list, sequences_iter,
+              workers=1, chunksize=DEFAULT_CHUNKSIZE, capacity=None, top_k=None,
+              snapshot_interval=None, snapshot_callback=None,
+              checkpoint_path=None, checkpoint_interval=None, initial=None):
     """Bootstrap sequence regular express pattern by the trigger pattern.
 
+    The sequences are counted shard by shard. If workers > 1, the shards are counted
+    across a pool of processes, and the partial counts are merged in the order of shards,
+    so that the result is identical to the one counted serially.
+
+    If capacity is given, only the heavy hitters are kept in a bounded memory,
+    and the freq is overestimated by at most (the number of patterns generated) / capacity,
+    see also `seq_re_counter <seq_re_counter.html>`_ module.
+
+    If checkpoint_path is given, the progress is saved into the file every checkpoint_interval
+    sequences, including the counts, the number of sequences consumed
+    and the fingerprint of the trigger setup. If the file exists, the run resumes from it,
+    in which the consumed sequences of sequences_iter are skipped without being counted.
+    The file is removed once all the sequences are counted,
+    so it is never resumed by a later run over another corpus.
+    To count a new slice of corpus, pass the result counted before as initial.
+
     :param len_tuple: The length of the tuple
     :param trigger_pattern: The pattern string
     :param trigger_dict_list: [{placeholder_name1: p1, placeholder_name2: p2}, ...]
                               in which p1, p2 could be a str or a list of str.
     :param sequences_iter: Yield one 2-dimensional sequence by one
+    :param workers: The number of worker processes, or None for the number of CPUs
+    :param chunksize: The number of sequences in a shard
+    :param capacity: The max number of patterns counted, or None to count all patterns exactly
+    :param top_k: The number of the most popular patterns returned, or None for all of them
+    :param snapshot_interval: The number of sequences between two snapshots,
+                              which are taken at the end of shards
+    :param snapshot_callback: The function called by each snapshot with the arguments:
+                              (the number of sequences consumed, [(pattern_generated, freq), ...])
+    :param checkpoint_path: The path of the checkpoint file, or None not to save the progress
+    :param checkpoint_interval: The number of sequences between two checkpoints,
+                                which are saved at the end of shards
+    :param initial: The result of the sequences counted before: [(pattern_generated, freq), ...],
+                    which is ignored if resuming from the checkpoint
     :return: [(pattern_generated, freq), ...]
     """
-    seq_re_list = _prepare(len_tuple, trigger_pattern, trigger_dict_list)
-    counter = dict()
-    # many sequences
-    for seq in sequences_iter:
-        for gen_pattern in _generate(seq_re_list, seq):
-            counter[gen_pattern] = counter.get(gen_pattern, 0) + 1
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers < 1 or chunksize < 1:
+        raise ValueError('invalid number of workers or chunk size')
+    if capacity is None:
+        counter = seq_re_counter.ExactCounter()
+    else:
+        counter = seq_re_counter.SpaceSavingCounter(capacity)
+    consumed = 0
+    fingerprint = None
+    checkpoint = None
+    if checkpoint_path is not None:
+        fingerprint = _fingerprint(len_tuple, trigger_pattern, trigger_dict_list, capacity)
+        checkpoint = _load_checkpoint(checkpoint_path, fingerprint)
+    if checkpoint is not None:
+        counter = seq_re_counter.ExactCounter.from_state(checkpoint['counter'])
+        consumed = checkpoint['consumed']
+        sequences_iter = itertools.islice(sequences_iter, consumed, None)
+    elif initial is not None:
+        counter.update(initial)
+    # noinspection PyProtectedMember
+    shards = seq_re_parallel._chunks(sequences_iter, chunksize)
+    if workers == 1:
+        prepared = _prepare(len_tuple, trigger_pattern, trigger_dict_list)
+        results = (_count_shard(shard, prepared) for shard in shards)
+    else:
+        # noinspection PyProtectedMember
+        results = seq_re_parallel._map_chunks(_count_shard, shards, workers, _init_worker,
+                                              (len_tuple, trigger_pattern, trigger_dict_list))
+    for shard_size, partial_items in results:
+        counter.update(partial_items)
+        consumed += shard_size
+        if snapshot_callback is not None and _crossed(consumed, shard_size, snapshot_interval):
+            snapshot_callback(consumed, counter.most_common(top_k))
+        if checkpoint_path is not None and _crossed(consumed, shard_size, checkpoint_interval):
+            _save_checkpoint(checkpoint_path, fingerprint, consumed, counter)
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        # the run is completed
+        os.remove(checkpoint_path)
     # sorted by the frequency
-    popular_patterns = sorted(counter.items(), key=lambda t: t[1], reverse=True)
-    return popular_patterns
+    return counter.most_common(top_k)
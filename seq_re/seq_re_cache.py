@@ -0,0 +1,174 @@
+# coding:utf-8
+
+"""
+Cache of compiled sequence regular express pattern
+==================================================
+
+Compiling a SEQ RE pattern means parsing it, encoding its literals and compiling the
+ordinary RE pattern. The artifacts only depend on the length of the tuple,
+the pattern string and the placeholder dict, so they are shared process-wide
+through a bounded LRU cache, like the cache in the ``re`` module.
+
+The templates of patterns, in which the placeholders are late-bound,
+are kept in another cache, so a pattern compiled with a new placeholder dict
+only binds the values to its template rather than being compiled again.
+
+>>> import seq_re
+>>> seq_re.cache_info()
+CacheInfo(hits=0, misses=0, maxsize=512, currsize=0)
+>>> seq_re.purge()
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import collections
+import threading
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+"""The statistics of the cache, similar to the one of functools.lru_cache()"""
+
+DEFAULT_MAXSIZE = 512  # the same as re._MAXCACHE
+
+
+def _freeze(value):
+    """Transform a placeholder value into a hashable and canonical form."""
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(value)
+    else:
+        return value
+
+
+def make_key(len_tuple, pattern, placeholder_dict, options=()):
+    """Make the canonical key of a compiled pattern.
+
+    :param len_tuple: The length of the tuple
+    :param pattern: A string of SEQ RE pattern
+    :param placeholder_dict: {placeholder_name1: p1, placeholder_name2: p2}
+    :param options: A tuple of the other options which affect the compiled pattern
+    :return: A hashable key, or None if the placeholder values are not hashable
+    """
+    try:
+        frozen_dict = frozenset((name, _freeze(value))
+                                for name, value in placeholder_dict.items())
+        key = (len_tuple, pattern, frozen_dict, options)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class PatternCache(object):
+    """A bounded and thread-safe LRU cache of the compiled artifacts."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        """Initialize a PatternCache instance.
+
+        :param maxsize: The max number of entries, and 0 disables the cache
+        """
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key => artifacts, the oldest first
+        self._maxsize = 0
+        self._hits = 0
+        self._misses = 0
+        self.maxsize = maxsize
+
+    @property
+    def maxsize(self):
+        """The max number of entries"""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError('invalid size of the cache')
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache is not oversized."""
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Look up the artifacts by key, and count a hit or a miss.
+
+        :param key: The key made by make_key()
+        :return: The cached artifacts, or None if missing
+        """
+        if key is None:
+            return None
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                self._misses += 1
+            else:
+                # move to the most recently used end
+                self._entries[key] = value
+                self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store the artifacts by key, evicting the least recently used entries if necessary.
+
+        :param key: The key made by make_key()
+        :param value: The compiled artifacts
+        """
+        if key is None or self._maxsize == 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            self._evict()
+
+    def purge(self):
+        """Clear the cache and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self):
+        """Report the statistics of the cache.
+
+        :return: A CacheInfo instance
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+
+default_cache = PatternCache()
+"""The process-wide cache used by SeqRegex.compile()"""
+
+template_cache = PatternCache()
+"""The process-wide cache used by SeqRegex.compile_template(),
+so that a pattern bound with many placeholder dicts is only compiled once"""
+
+
+def purge():
+    """Clear the process-wide cache of compiled patterns."""
+    default_cache.purge()
+    template_cache.purge()
+
+
+def cache_info():
+    """Report the statistics of the process-wide cache of compiled patterns.
+
+    :return: CacheInfo(hits, misses, maxsize, currsize)
+    """
+    return default_cache.info()
+
+
+def set_cache_size(maxsize):
+    """Bound the process-wide cache of compiled patterns.
+
+    :param maxsize: The max number of entries, and 0 disables the cache
+    """
+    default_cache.maxsize = maxsize
+    template_cache.maxsize = maxsize
@@ -0,0 +1,160 @@
+# coding:utf-8
+
+"""
+Streaming reader of the tagged corpus
+=====================================
+
+A tagged corpus has one sequence per line, in which the tuples are separated by spaces
+and the elements of a tuple are separated by a backtick, e.g.
+``中信证券`nc 保荐`v 机构`n``, the same as ``tests/seq_re_test_corpus.txt``.
+
+CorpusReader memory-maps the file and yields the sequences lazily,
+so a corpus larger than the memory can be matched line by line.
+The lines whose tuples are not of the given length are skipped and counted.
+
+>>> import seq_re
+>>> reader = seq_re.CorpusReader('corpus.txt', 2)
+>>> compiled = seq_re.SeqRegex(2).compile('[;nc] .{0,3} [保荐|担任]')
+>>> for sequence_index, match in compiled.finditer_many(reader):
+>>>     print(sequence_index, match.span())
+>>> print(reader.info())
+CorpusInfo(lines=..., sequences=..., malformed=...)
+
+The file can be split into byte ranges, each of which is read by a worker,
+and a line belongs to the range in which its first byte lies,
+so every line is read by exactly one worker:
+
+>>> for start, end in reader.shards(4):
+>>>     for sequence in seq_re.CorpusReader('corpus.txt', 2).read(start, end):
+>>>         pass
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import collections
+import mmap
+import os
+
+CorpusInfo = collections.namedtuple('CorpusInfo', ['lines', 'sequences', 'malformed'])
+"""The statistics of the lines read: the number of non-blank lines,
+the number of sequences yielded and the number of malformed lines skipped"""
+
+
+class CorpusReader(object):
+    """The class reads the sequences of tuples from a tagged corpus file lazily."""
+
+    def __init__(self, path, len_tuple, token_separator=None, field_separator='`',
+                 encoding='utf-8'):
+        """Initialize a CorpusReader instance.
+
+        :param path: The path of the corpus file
+        :param len_tuple: The number of elements in each tuple
+        :param token_separator: The separator between tuples, or None for any whitespace
+        :param field_separator: The separator between the elements of a tuple
+        :param encoding: The encoding of the file
+        """
+        if len_tuple < 1:
+            raise ValueError('invalid length of the tuple')
+        if not field_separator or field_separator == token_separator:
+            raise ValueError('invalid field separator')
+        self._path = path
+        self._len_tuple = len_tuple
+        self._token_separator = token_separator
+        self._field_separator = field_separator
+        self._encoding = encoding
+        self._lines = 0
+        self._sequences = 0
+        self._malformed = 0
+
+    def __iter__(self):
+        return self.read()
+
+    @property
+    def path(self):
+        """The path of the corpus file"""
+        return self._path
+
+    @property
+    def len_tuple(self):
+        """The number of elements in each tuple"""
+        return self._len_tuple
+
+    def info(self):
+        """Report the statistics of the lines read by this reader so far.
+
+        :return: CorpusInfo(lines, sequences, malformed)
+        """
+        return CorpusInfo(self._lines, self._sequences, self._malformed)
+
+    def _parse_line(self, line):
+        """Parse a line into a sequence of tuples.
+
+        :param line: The bytes of a line without the line break
+        :return: A list of tuples, [] if blank, or None if malformed
+        """
+        try:
+            line = line.decode(self._encoding).strip()
+        except UnicodeDecodeError:
+            return None
+        sequence = []
+        for item in line.split(self._token_separator):
+            if not item:
+                continue
+            n_tuple = item.split(self._field_separator)
+            if len(n_tuple) != self._len_tuple:
+                return None
+            sequence.append(n_tuple)
+        return sequence
+
+    def read(self, start=0, end=None):
+        """Yield the sequences of the lines starting in the byte range [start, end).
+
+        :param start: The byte offset where the range starts
+        :param end: The byte offset where the range ends, or None for the end of file
+        :return: An iterator which generates a sequence: [[element, ...], ...]
+        """
+        with open(self._path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if end is None or end > size:
+                end = size
+            if start >= end:
+                return
+            # an empty file cannot be mapped
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                pos = start
+                if start > 0:
+                    # the line across the start belongs to the previous range
+                    newline = mapped.find(b'\n', start - 1)
+                    pos = size if newline < 0 else newline + 1
+                while pos < end:
+                    newline = mapped.find(b'\n', pos)
+                    if newline < 0:
+                        newline = size
+                    sequence = self._parse_line(mapped[pos:newline])
+                    pos = newline + 1
+                    if sequence is None:
+                        self._lines += 1
+                        self._malformed += 1
+                    elif sequence:
+                        self._lines += 1
+                        self._sequences += 1
+                        yield sequence
+            finally:
+                mapped.close()
+
+    def shards(self, count):
+        """Split the file into byte ranges of nearly the same size.
+
+        :param count: The number of ranges
+        :return: [(start, end), ...] for read()
+        """
+        if count < 1:
+            raise ValueError('invalid number of shards')
+        size = os.path.getsize(self._path)
+        bounds = [size * i // count for i in range(count + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
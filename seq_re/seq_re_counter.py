@@ -0,0 +1,225 @@
+# coding:utf-8
+
+"""
+Counters of the generated patterns
+==================================
+
+bootstrap() counts the patterns generated from a stream of sequences.
+ExactCounter keeps every distinct pattern,
+whereas SpaceSavingCounter keeps a fixed number of patterns by the Space-Saving algorithm
+(Metwally et al., 2005), so that its memory is bounded on a large corpus
+in which the long tail of patterns appearing once or twice is unbounded.
+
+For a stream of N patterns counted by SpaceSavingCounter(capacity),
+
+- the freq of a pattern is overestimated by at most ``error`` <= N / capacity,
+  which is reported for each pattern;
+- any pattern whose true freq is greater than N / capacity is always kept.
+
+So capacity = ceil(1 / epsilon) is required to find all patterns
+whose freq is greater than epsilon * N, see also SpaceSavingCounter.for_error().
+
+>>> counter = SpaceSavingCounter(2)
+>>> counter.update([('a', 3), ('b', 1), ('c', 1)])
+>>> counter.most_common()
+[('a', 3), ('c', 2)]
+>>> counter.error('c')
+1
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import collections
+import heapq
+import itertools
+import math
+
+
+class ExactCounter(object):
+    """The counter which keeps every distinct pattern in the order they are counted first."""
+
+    def __init__(self):
+        self._counts = collections.OrderedDict()  # pattern => freq
+        self._total = 0  # the number of patterns counted
+
+    def __len__(self):
+        return len(self._counts)
+
+    @property
+    def total(self):
+        """The number of patterns counted"""
+        return self._total
+
+    def add(self, item, count=1):
+        """Count a pattern.
+
+        :param item: The pattern
+        :param count: The times the pattern occurs
+        """
+        self._counts[item] = self._counts.get(item, 0) + count
+        self._total += count
+
+    def update(self, items):
+        """Count the patterns, or merge the partial counts of another counter.
+
+        :param items: [(pattern, freq), ...]
+        """
+        for item, count in items:
+            self.add(item, count)
+
+    def items(self):
+        """Get the counts in the order the patterns are counted first.
+
+        :return: [(pattern, freq), ...]
+        """
+        return list(self._counts.items())
+
+    def error(self, item):
+        """The max overestimation of the freq of a pattern, which is always 0."""
+        return 0
+
+    def most_common(self, k=None):
+        """Get the most common patterns,
+        in which the patterns of the same freq are in the order they are counted first.
+
+        :param k: The number of patterns, or None for all patterns
+        :return: [(pattern, freq), ...]
+        """
+        popular = sorted(self._counts.items(), key=lambda t: t[1], reverse=True)
+        return popular if k is None else popular[:k]
+
+    def get_state(self):
+        """Dump the state of the counter into a JSON serializable dict.
+
+        :return: {'capacity': None, 'total': total, 'items': [[pattern, freq, error], ...]}
+        """
+        return {'capacity': None, 'total': self._total,
+                'items': [[item, count, self.error(item)]
+                          for item, count in self._counts.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        """Restore a counter from the state dumped by get_state().
+
+        :param state: The dict returned by get_state()
+        :return: An ExactCounter or SpaceSavingCounter instance
+        """
+        if state['capacity'] is None:
+            counter = ExactCounter()
+        else:
+            counter = SpaceSavingCounter(state['capacity'])
+        # noinspection PyProtectedMember
+        counter._restore(state)
+        return counter
+
+    def _restore(self, state):
+        for item, count, _ in state['items']:
+            self._counts[item] = count
+        self._total = state['total']
+
+
+class SpaceSavingCounter(ExactCounter):
+    """The counter which keeps the heavy hitters within a fixed number of patterns."""
+
+    def __init__(self, capacity):
+        """Initialize a SpaceSavingCounter instance.
+
+        :param capacity: The max number of patterns kept
+        """
+        super(SpaceSavingCounter, self).__init__()
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError('invalid capacity of the counter')
+        self._capacity = capacity
+        self._errors = dict()  # pattern => the max overestimation of its freq
+        self._ticks = dict()  # pattern => the tick it is updated last
+        self._heap = []  # [(freq, tick, pattern), ...] in which the stale entries are skipped
+        self._clock = itertools.count()
+
+    @classmethod
+    def for_error(cls, epsilon):
+        """Create a counter in which the freq is overestimated by at most epsilon * total.
+
+        :param epsilon: The relative error, 0 < epsilon <= 1
+        :return: A SpaceSavingCounter instance
+        """
+        if not 0 < epsilon <= 1:
+            raise ValueError('invalid relative error')
+        return cls(int(math.ceil(1.0 / epsilon)))
+
+    @property
+    def capacity(self):
+        """The max number of patterns kept"""
+        return self._capacity
+
+    @property
+    def error_bound(self):
+        """The max overestimation of the freq of any pattern: total / capacity"""
+        return self._total // self._capacity
+
+    def _push(self, item):
+        tick = next(self._clock)
+        self._ticks[item] = tick
+        heapq.heappush(self._heap, (self._counts[item], tick, item))
+        if len(self._heap) > 2 * self._capacity + 16:
+            # drop the stale entries
+            self._heap = [(count, self._ticks[key], key) for key, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        """Remove the pattern with the least freq, the one updated earliest among the ties.
+
+        :return: The freq of the pattern removed
+        """
+        while True:
+            count, tick, item = heapq.heappop(self._heap)
+            if self._ticks.get(item) == tick:
+                del self._counts[item]
+                del self._errors[item]
+                del self._ticks[item]
+                return count
+
+    def add(self, item, count=1):
+        """Count a pattern, which replaces the pattern with the least freq if the counter is full.
+
+        :param item: The pattern
+        :param count: The times the pattern occurs
+        """
+        self._total += count
+        if item in self._counts:
+            self._counts[item] += count
+        elif len(self._counts) < self._capacity:
+            self._counts[item] = count
+            self._errors[item] = 0
+        else:
+            min_count = self._pop_min()
+            self._counts[item] = min_count + count
+            self._errors[item] = min_count
+        self._push(item)
+
+    def _restore(self, state):
+        super(SpaceSavingCounter, self)._restore(state)
+        for item, _, error in state['items']:
+            self._errors[item] = error
+        # the ticks decide which one is replaced among the patterns of the same freq
+        self._ticks = dict(zip(self._counts, state['ticks']))
+        self._clock = itertools.count(max(state['ticks']) + 1 if state['ticks'] else 0)
+        self._heap = [(count, self._ticks[key], key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def get_state(self):
+        state = super(SpaceSavingCounter, self).get_state()
+        state['capacity'] = self._capacity
+        state['ticks'] = [self._ticks[item] for item in self._counts]
+        return state
+
+    def error(self, item):
+        """The max overestimation of the freq of a pattern.
+
+        :param item: The pattern
+        :return: The error, or None if the pattern is not kept
+        """
+        return self._errors.get(item)
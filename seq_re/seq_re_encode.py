@@ -0,0 +1,154 @@
+# coding:utf-8
+
+"""
+Vectorized encoding of sequences in batches
+===========================================
+
+CompiledSeqPattern encodes a sequence element by element in Python,
+which is the dominant cost when short patterns are matched against millions of tuples.
+BatchEncoder encodes a batch of sequences at once for a compiled pattern.
+
+If NumPy is installed, the strings of each column are mapped to the encoded chars
+by a vectorized lookup in the sorted vocabulary, the code points are filled into
+a UTF-32 buffer in bulk, and the buffer is decoded into a string in one call.
+Otherwise, it falls back to the pure Python encoding of CompiledSeqPattern.
+
+>>> import seq_re
+>>> compiled = seq_re.SeqRegex(2).compile('[;nt]+ [;v|vn]')
+>>> encoder = seq_re.BatchEncoder(compiled)
+>>> encoded = encoder.encode_columns([['中国', '保荐', '公司', '东方'], ['nt', 'vn', 'n', 'nt']])
+>>> encoded_list = encoder.split(encoded, [3, 1])
+
+The batch is given as columnar arrays, e.g. the columns of a data frame,
+since the cost of transposing the sequences of tuples in Python outweighs the gain.
+
+The install of NumPy is optional::
+
+    pip install seq_re[numpy]
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import seq_re_main
+
+HAS_NUMPY = numpy is not None
+"""Whether the vectorized encoding by NumPy is available"""
+
+
+class BatchEncoder(object):
+    """The class encodes a batch of sequences into the linear strings for a compiled pattern."""
+
+    def __init__(self, compiled, use_numpy=None):
+        """Initialize a BatchEncoder instance.
+
+        :param compiled: The CompiledSeqPattern object
+        :param use_numpy: Whether to encode by NumPy, or None to use it if installed
+        """
+        if use_numpy is None:
+            use_numpy = HAS_NUMPY
+        elif use_numpy and not HAS_NUMPY:
+            raise ImportError('NumPy is required by the vectorized encoding')
+        self._compiled = compiled
+        self._columns = compiled.columns
+        self._sentinel = seq_re_main.SENTINEL if compiled.aligned else ''
+        self._stride = len(self._columns) + len(self._sentinel)
+        self._use_numpy = use_numpy
+        self._keys = None  # the sorted array of the strings in the vocabulary
+        self._codes = None  # the array of code points encoding the keys
+        if use_numpy:
+            # noinspection PyProtectedMember
+            map_encode = compiled._map_encode
+            keys = sorted(key for key in map_encode if isinstance(key, seq_re_main.string_types))
+            if keys:
+                self._keys = numpy.array(keys)
+                self._codes = numpy.array([ord(map_encode[key]) for key in keys], dtype='<u4')
+
+    @property
+    def stride(self):
+        """The number of chars encoding a tuple"""
+        return self._stride
+
+    @property
+    def vectorized(self):
+        """Whether the encoding is vectorized by NumPy"""
+        return self._use_numpy
+
+    def _lookup(self, column):
+        """Map the strings of a column to the code points of the encoded chars.
+
+        :param column: A 1-D array or list of the elements in a column
+        :return: A 1-D array of uint32
+        """
+        try:
+            array = numpy.asarray(column)
+        except ValueError:
+            # the ragged multi-values
+            array = None
+        if array is None or array.dtype.kind != 'U':
+            # not all elements are strings
+            # noinspection PyProtectedMember
+            get = self._compiled._map_encode.get
+            return numpy.fromiter((ord(get(element, '.')) for element in column),
+                                  dtype='<u4', count=len(column))
+        codes = numpy.full(len(array), ord('.'), dtype='<u4')
+        if self._keys is not None and len(array) > 0:
+            keys = self._keys
+            indices = numpy.minimum(numpy.searchsorted(keys, array), len(keys) - 1)
+            hits = keys[indices] == array
+            codes[hits] = self._codes[indices[hits]]
+        return codes
+
+    def _encode_projected(self, projected_columns, count):
+        """Encode the projected columns of tuples into one linear string by NumPy.
+
+        :param projected_columns: The arrays of the projected columns of the pattern
+        :param count: The number of tuples
+        :return: The encoded string
+        """
+        buffer = numpy.empty((count, self._stride), dtype='<u4')
+        start = 0
+        if self._sentinel:
+            buffer[:, 0] = ord(self._sentinel)
+            start = 1
+        for i, column in enumerate(projected_columns):
+            buffer[:, start + i] = self._lookup(column)
+        return buffer.tobytes().decode('utf-32-le')
+
+    def encode_columns(self, columns):
+        """Encode the tuples given as columnar arrays into one linear string,
+        in which the i-th tuple starts at i * stride.
+
+        :param columns: [column_0, column_1, ...], in which column_j is a 1-D array (or list)
+                        of the j-th elements of all tuples
+        :return: The encoded string
+        """
+        if not self._use_numpy:
+            # noinspection PyProtectedMember
+            return self._compiled._encode_sequence(list(zip(*columns)))
+        count = len(columns[0]) if len(columns) > 0 else 0
+        return self._encode_projected([columns[column] for column in self._columns], count)
+
+    def split(self, encoded, lengths):
+        """Split the string encoded from the consecutive sequences into the one of each sequence.
+
+        :param encoded: The string returned by encode_columns()
+        :param lengths: The numbers of tuples in the sequences
+        :return: A list of the encoded strings
+        """
+        stride = self._stride
+        encoded_list = []
+        start = 0
+        for length in lengths:
+            end = start + length * stride
+            encoded_list.append(encoded[start:end])
+            start = end
+        return encoded_list
@@ -0,0 +1,292 @@
+# coding:utf-8
+
+"""
+Positional inverted index of a binary corpus
+============================================
+
+Matching a pattern over a corpus runs the RE over every sequence,
+even if the pattern requires a literal that presents in only a few sequences.
+build_index() writes an inverted index of a BinaryCorpus,
+which maps each (column, string) to its postings: the sorted list of
+(sequence_index, tuple_position) in which the string presents at the column of the tuple.
+
+CorpusIndex plans a query by the literal formula of the compiled pattern
+(see also SeqRegexParser.get_literal_formula()):
+the postings of the literals of each set are united, the sets joined by AND are intersected
+from the one with the fewest postings, and the branches joined by OR are united.
+Only the candidate sequences are encoded and confirmed by the RE.
+
+>>> import seq_re
+>>> corpus = seq_re.BinaryCorpus('corpus.bin')
+>>> index = seq_re.build_index(corpus)
+>>> compiled = seq_re.SeqRegex(2).compile('[中信证券] .{0,3} [保荐|担任]')
+>>> for sequence_index, match in index.finditer(compiled):
+>>>     print(sequence_index, match.span())
+
+The index is stored in the directory of the corpus by default:
+
+- ``postings.bin``: the (sequence_index, tuple_position) pairs of all keys, little-endian uint32;
+- ``posting_offsets.bin``: the index of the first posting of each key,
+  in which the key of (column, string) is ``column * vocabulary_size + string_id``,
+  little-endian uint64, followed by the total number of postings;
+- ``index.json``: the sizes.
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import os
+import struct
+
+from . import seq_re_binary
+from . import seq_re_parse as sp
+
+POSTINGS_FILE = 'postings.bin'
+POSTING_OFFSETS_FILE = 'posting_offsets.bin'
+INDEX_FILE = 'index.json'
+
+SKIP_RATIO = 16  # the conjunct whose postings outnumber the candidates so many times is skipped
+
+
+def _count_keys(corpus, count_keys):
+    """Count the postings of each key in the corpus by NumPy.
+
+    :return: (the keys of all elements of tuples in order, the counts of keys)
+    """
+    numpy = seq_re_binary.numpy
+    size = len(corpus.vocabulary)
+    # noinspection PyProtectedMember
+    keys = (corpus._tokens.astype('int64') +
+            numpy.arange(corpus.len_tuple, dtype='int64') * size).ravel()
+    return keys, numpy.bincount(keys, minlength=count_keys)
+
+
+def _build_by_numpy(corpus, count_keys, postings_file):
+    numpy = seq_re_binary.numpy
+    keys, counts = _count_keys(corpus, count_keys)
+    # the stable sort keeps the postings of a key in order
+    order = numpy.argsort(keys, kind='mergesort')
+    positions = order // corpus.len_tuple
+    # noinspection PyProtectedMember
+    offsets = corpus._offsets.astype('<u8')
+    sequence_indices = numpy.searchsorted(offsets, positions, side='right') - 1
+    postings = numpy.empty((len(order), 2), dtype='<u4')
+    postings[:, 0] = sequence_indices
+    postings[:, 1] = positions - offsets[sequence_indices]
+    postings_file.write(postings.tobytes())
+    return [0] + numpy.cumsum(counts).tolist()
+
+
+def _build_by_python(corpus, count_keys, postings_file):
+    size = len(corpus.vocabulary)
+    len_tuple = corpus.len_tuple
+    counts = [0] * count_keys
+
+    def sequence_ids():
+        for sequence_index in range(len(corpus)):
+            # noinspection PyProtectedMember
+            yield corpus._ids(corpus._offset(sequence_index), corpus._offset(sequence_index + 1))
+
+    for ids in sequence_ids():
+        for i, string_id in enumerate(ids):
+            counts[(i % len_tuple) * size + string_id] += 1
+    key_offsets = [0]
+    for count in counts:
+        key_offsets.append(key_offsets[-1] + count)
+    # counting sort of the postings by key
+    postings = [0] * (key_offsets[-1] * 2)
+    cursors = key_offsets[:-1]
+    for sequence_index, ids in enumerate(sequence_ids()):
+        for i, string_id in enumerate(ids):
+            key = (i % len_tuple) * size + string_id
+            postings[cursors[key] * 2] = sequence_index
+            postings[cursors[key] * 2 + 1] = i // len_tuple
+            cursors[key] += 1
+    postings_file.write(struct.pack('<%dI' % len(postings), *postings))
+    return key_offsets
+
+
+def build_index(corpus, path=None):
+    """Build the positional inverted index of a binary corpus.
+
+    :param corpus: The BinaryCorpus object
+    :param path: The path of the directory of the index, or None for the one of the corpus
+    :return: A CorpusIndex instance
+    """
+    if path is None:
+        path = corpus.path
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    count_keys = corpus.len_tuple * len(corpus.vocabulary)
+    with open(os.path.join(path, POSTINGS_FILE), 'wb') as postings_file:
+        if corpus.use_numpy:
+            key_offsets = _build_by_numpy(corpus, count_keys, postings_file)
+        else:
+            key_offsets = _build_by_python(corpus, count_keys, postings_file)
+    with open(os.path.join(path, POSTING_OFFSETS_FILE), 'wb') as offsets_file:
+        offsets_file.write(struct.pack('<%dQ' % len(key_offsets), *key_offsets))
+    # noinspection PyProtectedMember
+    seq_re_binary._dump_json({'len_tuple': corpus.len_tuple,
+                              'vocabulary_size': len(corpus.vocabulary),
+                              'postings': key_offsets[-1]},
+                             os.path.join(path, INDEX_FILE))
+    return CorpusIndex(corpus, path)
+
+
+class CorpusIndex(object):
+    """The class looks up the postings of a binary corpus, and plans the queries by them."""
+
+    def __init__(self, corpus, path=None):
+        """Initialize a CorpusIndex instance.
+
+        :param corpus: The BinaryCorpus object indexed
+        :param path: The path of the directory of the index, or None for the one of the corpus
+        """
+        if path is None:
+            path = corpus.path
+        # noinspection PyProtectedMember
+        meta = seq_re_binary._load_json(os.path.join(path, INDEX_FILE))
+        if (meta['len_tuple'] != corpus.len_tuple or
+                meta['vocabulary_size'] != len(corpus.vocabulary)):
+            raise ValueError('the index does not match the corpus')
+        self._corpus = corpus
+        self._size = meta['vocabulary_size']
+        self._files = []
+        self._postings = self._map(os.path.join(path, POSTINGS_FILE), '<u4', meta['postings'] * 2)
+        self._key_offsets = self._map(os.path.join(path, POSTING_OFFSETS_FILE), '<u8',
+                                      corpus.len_tuple * self._size + 1)
+
+    def _map(self, path, dtype, length):
+        # noinspection PyProtectedMember
+        array, mapped = seq_re_binary._map_array(path, dtype, length, self._corpus.use_numpy)
+        if mapped is not None:
+            self._files.append(mapped)
+        return array
+
+    def close(self):
+        """Release the memory-mapped files."""
+        for mapped in self._files:
+            mapped.close()
+        self._files = []
+        self._postings = self._key_offsets = None
+
+    @property
+    def corpus(self):
+        """The BinaryCorpus indexed"""
+        return self._corpus
+
+    def _range(self, column, string):
+        """Get the range of the postings of (column, string).
+
+        :return: (the index of the first posting, the index beyond the last posting)
+        """
+        string_id = self._corpus.vocabulary.get(string)
+        if string_id is None:
+            return 0, 0
+        key = column * self._size + string_id
+        if self._corpus.use_numpy:
+            return int(self._key_offsets[key]), int(self._key_offsets[key + 1])
+        return struct.unpack_from('<2Q', self._key_offsets, key * 8)
+
+    def postings(self, column, string):
+        """Get the postings of a string at a column of tuple.
+
+        :param column: The column of tuple
+        :param string: The string
+        :return: [(sequence_index, tuple_position), ...] in order
+        """
+        first, last = self._range(column, string)
+        if self._corpus.use_numpy:
+            return [tuple(posting) for posting in self._postings[first * 2:last * 2]
+                    .reshape(-1, 2).tolist()]
+        pairs = struct.unpack_from('<%dI' % ((last - first) * 2), self._postings, first * 8)
+        return list(zip(pairs[0::2], pairs[1::2]))
+
+    def _sequences(self, column, string):
+        """Get the set of the indices of sequences in which the string presents at the column."""
+        first, last = self._range(column, string)
+        if self._corpus.use_numpy:
+            return set(self._postings[first * 2:last * 2:2].tolist())
+        return set(struct.unpack_from('<%dI' % ((last - first) * 2), self._postings,
+                                      first * 8)[0::2])
+
+    def _columns_of(self, column, compiled):
+        # the element at a column of the pattern matches any column if not aligned
+        return [column] if compiled.aligned else range(self._corpus.len_tuple)
+
+    def _estimate(self, formula, compiled):
+        """Estimate the number of postings read to evaluate the formula, or None if unbounded."""
+        if formula[0] == sp.Formula.IN:
+            total = 0
+            for column in self._columns_of(formula[1], compiled):
+                for string in formula[2]:
+                    first, last = self._range(column, string)
+                    total += last - first
+            return total
+        estimates = [self._estimate(item, compiled) for item in formula[1]]
+        if formula[0] == sp.Formula.AND:
+            estimates = [estimate for estimate in estimates if estimate is not None]
+            return min(estimates) if estimates else None
+        if None in estimates:
+            return None
+        return sum(estimates)
+
+    def _plan(self, formula, compiled):
+        """Evaluate the formula by the postings.
+
+        :return: The set of the indices of the candidate sequences, or None for all sequences
+        """
+        if formula[0] == sp.Formula.IN:
+            candidates = set()
+            for column in self._columns_of(formula[1], compiled):
+                for string in formula[2]:
+                    candidates.update(self._sequences(column, string))
+            return candidates
+        if formula[0] == sp.Formula.AND:
+            # intersect from the most selective one, and stop once nothing is left
+            items = sorted((estimate, i) for estimate, i
+                           in ((self._estimate(item, compiled), i)
+                               for i, item in enumerate(formula[1]))
+                           if estimate is not None)
+            candidates = None
+            for estimate, i in items:
+                if candidates is None:
+                    candidates = self._plan(formula[1][i], compiled)
+                elif estimate > SKIP_RATIO * len(candidates):
+                    # reading the postings costs more than confirming the few candidates by the RE
+                    break
+                else:
+                    candidates &= self._plan(formula[1][i], compiled)
+                if not candidates:
+                    break
+            return candidates
+        candidates = set()
+        for item in formula[1]:
+            item_candidates = self._plan(item, compiled)
+            if item_candidates is None:
+                return None
+            candidates |= item_candidates
+        return candidates
+
+    def candidates(self, compiled):
+        """Find the sequences which could possibly match the compiled pattern by the postings.
+
+        :param compiled: The CompiledSeqPattern object
+        :return: A sorted list of the indices of sequences, or None if every sequence could match
+        """
+        candidates = self._plan(compiled.literal_formula, compiled)
+        return None if candidates is None else sorted(candidates)
+
+    def finditer(self, compiled):
+        """
+        Return an iterator yielding (sequence_index, SeqMatchObject)
+        over all non-overlapping matches in each candidate sequence,
+        the same as BinaryCorpus.finditer() over all sequences.
+
+        :param compiled: The CompiledSeqPattern object
+        :return: An iterator which generates (sequence_index, SeqMatchObject Instance)
+        """
+        return self._corpus.finditer(compiled, sequence_indices=self.candidates(compiled))
@@ -17,8 +17,11 @@ __copyright__ = "Copyright (C) 2017 GE Ning"
 __license__ = "LGPL-3.0"
 __version__ = "1.2"
 
+import bisect
+import itertools
 import re
 
+from . import seq_re_cache
 from . import seq_re_parse as sp
 
 # compatible with Python 2 & 3
@@ -40,6 +43,260 @@ except NameError:
     # Python 3
     unicode_str = str
 
+try:
+    # Python 2
+    # noinspection PyCompatibility
+    string_types = basestring
+except NameError:
+    # Python 3
+    string_types = str
+
+SENTINEL = unicode_char(0x1f)
+"""The char which marks the beginning of each tuple in the aligned mode,
+and it never encodes any element of the tuple."""
+
+SEPARATOR = '\n'
+"""The char which separates the sequences concatenated into one string,
+and it is never matched by any element of the pattern."""
+
+PREFILTER_SAMPLE = 256
+"""The number of sequences checked by the prefilter of the batch matching,
+after which it is dropped if it rejects less than 1/8 of them,
+since the literals are so common that the check costs more than it saves."""
+
+
+def token_set(sequence):
+    """Collect the distinct strings of all elements in the sequence.
+
+    :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+    :return: A set of strings, including the values of the multi-value elements
+    """
+    tokens = set()
+    for n_tuple in sequence:
+        for element in n_tuple:
+            if isinstance(element, string_types):
+                tokens.add(element)
+            elif hasattr(element, '__iter__'):
+                # list, set
+                tokens.update(element)
+            else:
+                tokens.add(element)
+    return tokens
+
+
+def _translate(parsed, encode, group_prefix='', group_offset=0, sentinel='', columns=None,
+               separator=''):
+    """Transform the parsed pattern stack into an ordinary RE string.
+
+    :param parsed: parsed = [(Flag, parsed_pattern, begin_pos), ...]
+    :param encode: The function which encodes a literal into a single char
+    :param group_prefix: The prefix to rename the named groups and their references
+    :param group_offset: The offset to renumber the group indices in conditional references
+    :param sentinel: The char leading each tuple in the aligned mode, or '' if not aligned
+    :param columns: The projected columns of tuple to be kept, or None to keep all columns
+    :param separator: The char separating the sequences, which the negative sets must exclude
+    :return: a ordinary RE string
+    """
+    pattern_str_list = []
+    reference = False  # the next EX is the name or index of a group referred
+    column = None  # the column of the next element in a tuple, or None out of tuples
+    in_set = False
+    for flag, string, pos in parsed:
+        if flag == sp.Flags.SET_NEG:
+            string += separator
+        if flag == sp.Flags.TUPLE_START:
+            column = 0
+            pattern_str_list.append(string + sentinel)
+        elif flag == sp.Flags.TUPLE_END:
+            column = None
+            pattern_str_list.append(string)
+        elif column is not None and columns is not None:
+            # the elements of a tuple, in which the unprojected columns are dropped
+            if flag == sp.Flags.EXP:
+                pattern_str_list.extend('.' for i in range(column, column + len(string))
+                                        if i in columns)
+                column += len(string)
+            elif flag == sp.Flags.SET_START:
+                in_set = True
+                if column in columns:
+                    pattern_str_list.append(string)
+            elif flag == sp.Flags.SET_END:
+                in_set = False
+                if column in columns:
+                    pattern_str_list.append(string)
+                column += 1
+            elif column in columns:
+                pattern_str_list.append(encode(string) if flag == sp.Flags.LITERAL else string)
+            if not in_set and flag == sp.Flags.LITERAL:
+                column += 1
+        elif flag == sp.Flags.EXP and string.startswith('(?:'):
+            # `.` out of the tuple => `(?:...)`
+            if columns is not None:
+                string = '(?:%s)' % ('.' * len(columns))
+            pattern_str_list.append(string[:3] + sentinel + string[3:])
+        elif flag == sp.Flags.LITERAL:
+            pattern_str_list.append(encode(string))
+        elif flag == sp.Flags.GROUP_NAME:
+            pattern_str_list.append(group_prefix + string)
+        elif reference:
+            # `(?P=name)` `(?(name)...)` `(?(1)...)`
+            if string.isdigit():
+                pattern_str_list.append(str(int(string) + group_offset))
+            else:
+                pattern_str_list.append(group_prefix + string)
+        elif string is not None:
+            pattern_str_list.append(string)
+        reference = flag == sp.Flags.EXT_SIGN and string in ('?P=', '?(')
+    return ''.join(pattern_str_list)
+
+
+def _cap_quantifiers(parsed, cap):
+    """Bound the unbounded quantifiers `*` `+` `{m,}` of the parsed pattern stack,
+    which repeat cap times at most, or m times if m > cap.
+
+    :param parsed: parsed = [(Flag, parsed_pattern, begin_pos), ...]
+    :param cap: The max number of repeats
+    :return: The parsed pattern stack whose quantifiers are all bounded
+    """
+    capped = []
+    ix = 0
+    while ix < len(parsed):
+        flag, string, pos = parsed[ix]
+        if flag == sp.Flags.EX and string in ('*', '+'):
+            string = '{%d,%d}' % (0 if string == '*' else 1, max(cap, 1))
+        elif flag == sp.Flags.EX and string == '{':
+            chars = []
+            end = ix + 1
+            while end < len(parsed) and parsed[end][0] == sp.Flags.EX and parsed[end][1] != '}':
+                chars.append(parsed[end][1])
+                end += 1
+            items = ''.join(chars).split(',')
+            if (end < len(parsed) and parsed[end][0] == sp.Flags.EX and len(items) == 2 and
+                    items[0].isdigit() and items[1] == ''):
+                low = int(items[0])
+                capped.append([flag, '{%d,%d}' % (low, max(low, cap)), pos])
+                ix = end + 1
+                continue
+        capped.append([flag, string, pos])
+        ix += 1
+    return capped
+
+
+def _projection(parser, len_tuple, aligned):
+    """Decide the columns of tuple to be encoded for a parsed pattern.
+
+    The unreferenced columns are always matched by `.`, so they are dropped from
+    both the encoded sequence and the RE, except that a back reference compares
+    the whole tuples, and a tuple needs one char at least if it is not led by the sentinel.
+
+    :param parser: The SeqRegexParser object which has parsed the pattern
+    :param len_tuple: The length of the tuple
+    :param aligned: Whether each tuple is led by the sentinel char
+    :return: A tuple of column indices, or None if all columns are needed
+    """
+    for flag, string, _ in parser.pattern_stack:
+        if flag == sp.Flags.EXT_SIGN and string == '?P=':
+            return None
+    columns = parser.get_referenced_columns()
+    if not columns and not aligned:
+        columns = [0]
+    if len(columns) == len_tuple:
+        return None
+    return tuple(columns)
+
+
+def _contains(formula, encoded_str):
+    """Check whether an encoded string satisfies the formula of the encoded literals,
+    in which each test is a fast search of the char in the string.
+
+    :param formula: The literal formula translated by the encoding dict
+    :param encoded_str: The encoded string of a sequence
+    :return: True if satisfied else False
+    """
+    if formula[0] == sp.Formula.IN:
+        for char in formula[2]:
+            if char in encoded_str:
+                return True
+        return False
+    elif formula[0] == sp.Formula.AND:
+        return all(_contains(item, encoded_str) for item in formula[1])
+    else:
+        return any(_contains(item, encoded_str) for item in formula[1])
+
+
+def _hits(char_sets, encoded_str):
+    """Check whether each set has a char present in the encoded string.
+
+    :param char_sets: (frozenset of chars, ...) returned by CompiledSeqPattern._prefilter_chars()
+    :param encoded_str: The encoded string of a sequence
+    :return: True if every set is hit else False
+    """
+    for chars in char_sets:
+        for char in chars:
+            if char in encoded_str:
+                break
+        else:
+            return False
+    return True
+
+
+def _is_self_aligned(branches):
+    """Check whether any match of the parsed structure starts by consuming a tuple,
+    which means the match cannot be empty, and every char consumed belongs to a tuple.
+
+    :param branches: The parsed structure returned by SeqRegexParser.get_structure()
+    :return: True if the match always starts with the sentinel else False
+    """
+    def consuming(node):
+        # whether the node consumes one tuple at least, or None if it consumes other chars
+        node_type = node[0]
+        if node_type == sp.Nodes.TUPLE:
+            return True
+        elif node_type == sp.Nodes.GROUP:
+            return all_consuming(node[1])
+        elif node_type in (sp.Nodes.COND, sp.Nodes.ASSERT, sp.Nodes.NOT_ASSERT):
+            return False if all_consuming(node[1]) is not None else None
+        elif node_type == sp.Nodes.REPEAT:
+            result = consuming(node[1])
+            return result and node[2] > 0 if result is not None else None
+        elif node_type == sp.Nodes.OPAQUE:
+            return None
+        else:
+            # ANCHOR, BACKREF
+            return False
+
+    def all_consuming(node_branches):
+        result = True
+        for branch in node_branches:
+            branch_result = False
+            for node in branch:
+                node_result = consuming(node)
+                if node_result is None:
+                    return None
+                branch_result = branch_result or node_result
+            result = result and branch_result
+        return result
+
+    return bool(all_consuming(branches))
+
+
+def _align(regex_pattern, sentinel, self_aligned=False):
+    """Guard an ordinary RE string to start a match only at the boundary of tuples,
+    which is followed by the sentinel or the end of the string.
+
+    The guard is omitted if every match starts with the sentinel by itself,
+    so that the RE engine can search the sentinel as the literal prefix.
+
+    :param regex_pattern: The RE string translated with the sentinel
+    :param sentinel: The char leading each tuple in the aligned mode, or '' if not aligned
+    :param self_aligned: Whether any match starts by consuming a tuple
+    :return: a ordinary RE string
+    """
+    if sentinel and not self_aligned:
+        return '(?=%s|$)(?:%s)' % (sentinel, regex_pattern)
+    else:
+        return regex_pattern
+
 
 class SeqRegex(object):
     """
@@ -49,6 +306,16 @@ class SeqRegex(object):
     which are suitable for using the ordinary regular expression (RE) to match.
 
     Finally, the match result will be located in the original sequence.
+
+    The compiled pattern is a CompiledSeqPattern instance, which has no shared mutable state,
+    whereas SeqRegex itself only remembers the pattern compiled most recently.
+
+    In the aligned mode (by default), each tuple is led by a sentinel char in the linear string,
+    so that a match can only start at the boundary of tuples,
+    and the RE engine skips the other positions at once.
+
+    Only the columns of tuple referenced by the pattern are encoded into the linear string,
+    since the other columns are always matched by `.`.
     """
 
     # ######################################## #
@@ -57,41 +324,49 @@ class SeqRegex(object):
     #                                          #
     # ######################################## #
 
-    def __init__(self, len_tuple):
+    def __init__(self, len_tuple, aligned=True):
         """Initialize a SeqRegex instance.
         
         :param len_tuple: The length of the tuple
+        :param aligned: Start a match only at the boundary of tuples if True
         """
         if isinstance(len_tuple, int) and len_tuple > 0:
             self._len_tuple = len_tuple  # The length of the tuple
         else:
             raise ValueError('invalid length of the tuple')
+        self._aligned = aligned  # the aligned mode
         self._pattern = None  # the original string of pattern
         self._placeholder_dict = None  # the substitutions of placeholders in the pattern
         self._map_encode = dict()  # encoding dict：a phrase (words) => a single char of unicode
         # self._map_decode = dict()  # decoding dict：a single char of unicode => original words
         self._map_counter = 0  # counter：the number of different phrases
         self._parser = sp.SeqRegexParser()  # the SeqRegexPasrse object
-        self._regex = None  # the ordinary regular expression object: RegexObject
+        self._compiled = None  # the CompiledSeqPattern object compiled most recently
 
     @property
     def len_tuple(self):
         """The length of the tuple"""
         return self._len_tuple
 
+    @property
+    def aligned(self):
+        """Whether a match only starts at the boundary of tuples"""
+        return self._aligned
+
     @property
     def pattern(self):
         """The original string of pattern"""
         return self._pattern
 
     def _clear(self):
+        # the artifacts are shared with the CompiledSeqPattern, so never clear them in place
         self._pattern = None
         self._placeholder_dict = None
-        self._map_encode.clear()
-        # self._map_decode.clear()
+        self._map_encode = dict()
+        # self._map_decode = dict()
         self._map_counter = 0
-        self._parser.__init__()
-        self._regex = None
+        self._parser = sp.SeqRegexParser()
+        self._compiled = None
 
     # ######################################## #
     #                                          #
@@ -99,16 +374,15 @@ class SeqRegex(object):
     #                                          #
     # ######################################## #
 
-    def _encode_str(self, decoded_str, default=None):
-        """Encode a string.
+    def _encode_str(self, decoded_str):
+        """Encode a string of the pattern.
 
         :param decoded_str: a string to be encoded
-        :param default: the default string to replace the string which has not been encoded
-        :return: an encoded string if default is not None else default
+        :return: an encoded string
         """
         if decoded_str in self._map_encode:
             return self._map_encode[decoded_str]
-        elif default is None:
+        else:
             # 映射到从'中'字开始连续的unicode字符
             # continuously map to the unicode chars from the chinese u'中'
             # ord(u'中') = 20013
@@ -125,157 +399,20 @@ class SeqRegex(object):
             # self._map_decode[encoded_str] = decoded_str
             self._map_counter += 1
             return encoded_str
-        else:
-            return default
 
     def _encode_pattern(self):
-        """Encode the original string SEQ RE pattern into a equivalent of ordinary RE pattern.
+        """Encode the original string SEQ RE pattern into a equivalent of ordinary RE pattern,
+        which matches only the projected columns referenced by the pattern.
 
-        :return: a ordinary RE string
+        :return: (a ordinary RE string, the projected columns or None if all columns)
         """
         parsed = self._parser.parse(self._len_tuple, self._pattern, **self._placeholder_dict)
-        # transform _pattern_stack into pseudo regular expression string for check or test
-        pattern_str_list = []
-        if parsed:
-            for ix in range(len(parsed)):
-                flag, string, pos = parsed[ix]
-                if flag == sp.Flags.LITERAL:
-                    pattern_str_list.append(self._encode_str(string))
-                elif string is not None:
-                    pattern_str_list.append(string)
         # for debug
         # print self._parser.dump()
-        # print ''.join(pattern_str_list)
-        return ''.join(pattern_str_list)
-
-    def _encode_sequence(self, sequence):
-        """Encode the 2-dimension sequence into a linear of string for matching the pattern"""
-        stack_encoded = []
-        for n_tuple in sequence:
-            for element in n_tuple:
-                # string not presenting in the pattern needs not to be encoded into a unicode char
-                stack_encoded.append(self._encode_str(element, '.'))
-        return ''.join(stack_encoded)
-
-    # ######################################## #
-    #                                          #
-    #  Result Objects                          #
-    #                                          #
-    # ######################################## #
-
-    class SeqRegexObject(object):
-        """The class wraps the SeqRegex itself for the simplified use."""
-
-        __slots__ = ('_outer',)
-
-        def __init__(self, outer_class):
-            assert isinstance(outer_class, SeqRegex)
-            self._outer = outer_class
-
-        def finditer(self, sequence):
-            return self._outer.finditer(self._outer._pattern, sequence)
-
-        def search(self, sequence):
-            return self._outer.search(self._outer._pattern, sequence)
-
-        def findall(self, sequence):
-            return self._outer.findall(self._outer._pattern, sequence)
-
-        def is_useless_for(self, sequence):
-            """For preliminary screening the seq in advanced,
-            to check whether regular expression has no chance of success.
-
-            :param sequence:  A 2-dimensional Sequence (or the sequence of tuples)
-            :return: True if SEQ RE no chance of success else False
-            """
-            # for literals in the negative set,
-            # not sure whether they should or should not be in the seq.
-            # for literals in the positive set,
-            # any one could be in the seq,
-            # and their order cannot be determined in advanced.
-            positive_sets = self._outer._parser.get_positive_literal_sets()
-            useless = True
-            for each_set in positive_sets:
-                useless = True
-                for literal in each_set:
-                    # seq.find(literal) > -1 but seq is not a string
-                    for n_tuple in sequence:
-                        for e in n_tuple:
-                            # list, set
-                            if hasattr(e, '__iter__'):
-                                if literal in e:
-                                    useless = False
-                                    break
-                            # string
-                            else:
-                                if literal == e:
-                                    useless = False
-                                    break
-            return useless
-
-    class SeqMatchObject(object):
-        """The class manages the match results that the SeqRegex returned,
-        and the matched group can be acquired by the group_list or named_group_dict.
-        """
-
-        __slots__ = ('group_list', 'named_group_dict', 'sq_re')
-
-        def __init__(self, outer_class):
-            # public member
-            self.group_list = []
-            """All indexed groups matched in a result, including named and unnamed groups"""
-            self.named_group_dict = dict()  # add index to consider as collections.OrderedDict
-            """All named groups matched in a result"""
-            self.sq_re = outer_class  # The outer class is the SeqRegex itself
-            """The SeqRegex Instance which returned this SeqMatchObject Instance"""
-
-        def format_group_to_str(self, group_name, trimmed=True):
-            """Output a named group matched in the result, according the format string
-            indicated after the group name in the original pattern string.
-
-            :param group_name: The group name
-            :param trimmed: Remove the group name and parentheses if trimmed == True else keep them
-            :return: A string of the matched result
-            """
-            formatted_str_list = []
-
-            def formatter(n_tuple):
-                formatted_str = ';'.join(['|'.join(unicode_str(values))
-                                          if hasattr(values, '__iter__') else
-                                          unicode_str(values) for values in
-                                          n_tuple])  # support multi-value element
-                formatted_str = formatted_str.rstrip(';')
-                if len(formatted_str) > 0:
-                    return '[%s]' % formatted_str
-                else:
-                    return '.'
-
-            if group_name in self.named_group_dict:
-                group_index, match_sequence, _, _ = self.named_group_dict[group_name]
-                # noinspection PyProtectedMember
-                if group_name in self.sq_re._parser.named_group_format_indices:
-                    # noinspection PyProtectedMember
-                    format_indices = self.sq_re._parser.named_group_format_indices[group_name]
-                    if format_indices is not None:
-                        for match_tuple in match_sequence:
-                            formatted_tuple = [''] * self.sq_re.len_tuple
-                            for low, high in format_indices:
-                                formatted_tuple[low: high] = match_tuple[low: high]
-                            formatted_str_list.append(formatter(formatted_tuple))
-                    else:
-                        # noinspection PyProtectedMember
-                        # `@@` => get pattern itself
-                        pattern_sub = self.sq_re._parser.get_pattern_by_name(group_name)
-                        # `(?:P<name@@>pattern_sub)`
-                        if trimmed:
-                            # `pattern_sub`
-                            pattern_sub = pattern_sub[pattern_sub.find('>') + 1: -1]
-                        formatted_str_list.append(pattern_sub)
-                else:
-                    # default formatter
-                    for match_tuple in match_sequence:
-                        formatted_str_list.append(formatter(match_tuple))
-            return ' '.join(formatted_str_list)
+        sentinel = SENTINEL if self._aligned else ''
+        columns = _projection(self._parser, self._len_tuple, self._aligned)
+        return _align(_translate(parsed, self._encode_str, sentinel=sentinel, columns=columns),
+                      sentinel, _is_self_aligned(self._parser.get_structure())), columns
 
     # ######################################## #
     #                                          #
@@ -286,17 +423,73 @@ class SeqRegex(object):
     def compile(self, pattern, **placeholder_dict):
         """Compile a SEQ RE pattern into a ordinary RE object.
 
+        The compiled artifacts are looked up in the process-wide cache at first,
+        see also `seq_re_cache <seq_re_cache.html>`_ module.
+        If missing, the placeholder values are bound to the template of the pattern,
+        see also compile_template().
+
         :param pattern: A string of SEQ RE pattern
         :param placeholder_dict: {placeholder_name1: p1, placeholder_name2: p2}
                                  in which p1, p2 could be a str or a list of str.
-        :return: A SeqRegexObject Instance
+        :return: A CompiledSeqPattern Instance
         """
         self._clear()
+        key = seq_re_cache.make_key(self._len_tuple, pattern, placeholder_dict,
+                                    options=(self._aligned,))
+        compiled = seq_re_cache.default_cache.get(key)
+        if compiled is None:
+            if placeholder_dict and key is not None:
+                # bind the values to the template compiled once for the placeholder names
+                template = self.compile_template(pattern, *sorted(placeholder_dict))
+                compiled = template.bind(**placeholder_dict)
+            else:
+                compiled = self._compile_pattern(pattern, placeholder_dict)
+            seq_re_cache.default_cache.put(key, compiled)
+        self._pattern = pattern
+        self._placeholder_dict = placeholder_dict
+        self._compiled = compiled
+        return compiled
+
+    def _compile_pattern(self, pattern, placeholder_dict):
+        """Compile a SEQ RE pattern without clearing the encoding dict,
+        so that the patterns compiled one after another share the same vocabulary.
+
+        :param pattern: A string of SEQ RE pattern
+        :param placeholder_dict: {placeholder_name1: p1, placeholder_name2: p2}
+        :return: A CompiledSeqPattern Instance
+        """
         self._pattern = pattern
         self._placeholder_dict = placeholder_dict
-        regex_pattern = self._encode_pattern()
-        self._regex = re.compile(regex_pattern)
-        return self.SeqRegexObject(self)
+        self._parser = sp.SeqRegexParser()
+        regex_pattern, columns = self._encode_pattern()
+        self._compiled = CompiledSeqPattern(self._len_tuple, pattern, self._parser,
+                                            self._map_encode, re.compile(regex_pattern),
+                                            self._aligned, columns)
+        return self._compiled
+
+    def compile_template(self, pattern, *placeholder_names):
+        """Compile a SEQ RE pattern once, in which the placeholders are late-bound slots.
+
+        Each placeholder is encoded into a dedicated char, and binding the values
+        only makes a new encoding dict, which costs O(the number of literals and values).
+        The templates are looked up in the process-wide cache at first.
+
+        :param pattern: A string of SEQ RE pattern
+        :param placeholder_names: The names of placeholders
+        :return: A CompiledSeqTemplate Instance
+        """
+        self._clear()
+        key = seq_re_cache.make_key(self._len_tuple, pattern, dict(),
+                                    options=(self._aligned, tuple(sorted(placeholder_names))))
+        template = seq_re_cache.template_cache.get(key)
+        if template is None:
+            # each placeholder is parsed as a literal of its own name, encoded as its slot
+            compiled = self._compile_pattern(pattern, dict((name, [name])
+                                                           for name in placeholder_names))
+            self._clear()
+            template = CompiledSeqTemplate(compiled, placeholder_names)
+            seq_re_cache.template_cache.put(key, template)
+        return template
 
     def finditer(self, pattern, sequence):
         """
@@ -310,26 +503,10 @@ class SeqRegex(object):
         :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
         :return: An iterator which generates a SeqMatchObject Instance
         """
+        compiled = self._compiled
         if pattern != self._pattern:
-            self.compile(pattern)
-
-        regex_string = self._encode_sequence(sequence)
-        for match in self._regex.finditer(regex_string):
-            match_object = SeqRegex.SeqMatchObject(self)
-            # The entire match (group_index = 0) and Parenthesized subgroups
-            for group_index in range(len(match.groups()) + 1):
-                start = match.start(group_index) // self._len_tuple
-                end = match.end(group_index) // self._len_tuple
-                match_object.group_list.append((group_index,
-                                                sequence[start:end], start, end))
-            # Named subgroups
-            for group_name, group_index in self._regex.groupindex.items():
-                start = match.start(group_index) // self._len_tuple
-                end = match.end(group_index) // self._len_tuple
-                # group_index is needed to sort the named groups in order
-                match_object.named_group_dict[group_name] = (group_index,
-                                                             sequence[start:end], start, end)
-            yield match_object
+            compiled = self.compile(pattern)
+        return compiled.finditer(sequence)
 
     def search(self, pattern, sequence):
         """
@@ -351,3 +528,741 @@ class SeqRegex(object):
         :return: A list of SeqMatchObject Instance
         """
         return list(self.finditer(pattern, sequence))
+
+
+class CompiledSeqPattern(object):
+    """The immutable SEQ RE pattern returned by SeqRegex.compile().
+
+    It holds its own encoding dict, RE object and group metadata,
+    which are never modified after compiling,
+    so that one instance can be shared by many threads without locks.
+    """
+
+    __slots__ = ('_len_tuple', '_pattern', '_parser', '_map_encode', '_regex',
+                 '_sentinel', '_columns', '_stride', '_formula', '_literals', '_literal_encode',
+                 '_width', '_concat_regex')
+
+    def __init__(self, len_tuple, pattern, parser, map_encode, regex, aligned=True,
+                 columns=None, formula=None, literal_encode=None, width=None):
+        """Initialize a CompiledSeqPattern instance.
+
+        :param len_tuple: The length of the tuple
+        :param pattern: The original string of pattern
+        :param parser: The SeqRegexParser object which has parsed the pattern
+        :param map_encode: The encoding dict of the literals in the pattern
+        :param regex: The ordinary regular expression object: RegexObject
+        :param aligned: Whether each tuple is led by the sentinel char
+        :param columns: The projected columns of tuple encoded, or None if all columns
+        :param formula: The literal formula, or None to get it from the parser
+        :param literal_encode: The encoding dict of the literals parsed from the pattern,
+                               which differs from map_encode only if bound by a template
+        :param width: (min_width, max_width), or None to get it from the parser
+        """
+        sentinel = SENTINEL if aligned else ''
+        object.__setattr__(self, '_sentinel', sentinel)
+        object.__setattr__(self, '_columns', columns)
+        # the number of chars encoding a tuple
+        count_columns = len_tuple if columns is None else len(columns)
+        object.__setattr__(self, '_stride', count_columns + len(sentinel))
+        object.__setattr__(self, '_len_tuple', len_tuple)
+        object.__setattr__(self, '_pattern', pattern)
+        object.__setattr__(self, '_parser', parser)
+        object.__setattr__(self, '_map_encode', map_encode)
+        object.__setattr__(self, '_regex', regex)
+        # the prefilter: the boolean formula of literals required by any match
+        if formula is None:
+            formula = parser.get_literal_formula()
+        object.__setattr__(self, '_formula', formula)
+        object.__setattr__(self, '_literals', frozenset(sp.Formula.literals(formula)))
+        if literal_encode is None:
+            literal_encode = map_encode
+        object.__setattr__(self, '_literal_encode', literal_encode)
+        # the numbers of tuples spanned by any match, which screen out the short sequences
+        if width is None:
+            width = parser.get_width()
+        object.__setattr__(self, '_width', width)
+        # the RE over the concatenated sequences, compiled on demand
+        object.__setattr__(self, '_concat_regex', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompiledSeqPattern is immutable')
+
+    def __getstate__(self):
+        # the RE over the concatenated sequences is compiled again on demand
+        return dict((name, getattr(self, name)) for name in self.__slots__
+                    if name != '_concat_regex')
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_concat_regex', None)
+
+    def __repr__(self):
+        return 'CompiledSeqPattern(%d, %r)' % (self._len_tuple, self._pattern)
+
+    @property
+    def len_tuple(self):
+        """The length of the tuple"""
+        return self._len_tuple
+
+    @property
+    def pattern(self):
+        """The original string of pattern"""
+        return self._pattern
+
+    @property
+    def aligned(self):
+        """Whether a match only starts at the boundary of tuples"""
+        return bool(self._sentinel)
+
+    @property
+    def regex(self):
+        """The ordinary regular expression object: RegexObject"""
+        return self._regex
+
+    @property
+    def columns(self):
+        """The columns of tuple encoded for matching,
+        see also SeqRegexParser.get_referenced_columns()"""
+        if self._columns is None:
+            return tuple(range(self._len_tuple))
+        return self._columns
+
+    @property
+    def min_width(self):
+        """The min number of tuples spanned by any match, see also SeqRegexParser.get_width()"""
+        return self._width[0]
+
+    @property
+    def max_width(self):
+        """The max number of tuples spanned by any match, or None if unbounded"""
+        return self._width[1]
+
+    @property
+    def literal_formula(self):
+        """The boolean formula of literals that any match must satisfy,
+        see also SeqRegexParser.get_literal_formula()"""
+        return self._formula
+
+    @property
+    def required_literal_sets(self):
+        """The literal sets that any match must contain: (frozenset(['str', 'str']), ...)"""
+        return tuple(sp.Formula.required(self._formula))
+
+    @property
+    def named_group_format_indices(self):
+        """The format indices of the named groups"""
+        return self._parser.named_group_format_indices
+
+    def get_pattern_by_name(self, group_name):
+        """Get original pattern string determined by group name.
+
+        :param group_name: The group name
+        :return: The substring of original pattern
+        """
+        return self._parser.get_pattern_by_name(group_name)
+
+    def _project(self, columns):
+        """Make a copy of the pattern which encodes the other projected columns,
+        which must contain all the columns referenced by the pattern.
+
+        :param columns: The projected columns of tuple, or None if all columns
+        :return: A CompiledSeqPattern Instance
+        """
+        sentinel = self._sentinel
+        regex_pattern = _align(_translate(self._parser.pattern_stack,
+                                          self._literal_encode.__getitem__,
+                                          sentinel=sentinel, columns=columns),
+                               sentinel, _is_self_aligned(self._parser.get_structure()))
+        return CompiledSeqPattern(self._len_tuple, self._pattern, self._parser, self._map_encode,
+                                  re.compile(regex_pattern), self.aligned, columns, self._formula,
+                                  self._literal_encode, self._width)
+
+    def _cap(self, cap):
+        """Make a copy of the pattern whose unbounded quantifiers repeat cap times at most.
+
+        :param cap: The max number of repeats
+        :return: A CompiledSeqPattern Instance
+        """
+        sentinel = self._sentinel
+        regex_pattern = _align(_translate(_cap_quantifiers(self._parser.pattern_stack, cap),
+                                          self._literal_encode.__getitem__,
+                                          sentinel=sentinel, columns=self._columns),
+                               sentinel, _is_self_aligned(self._parser.get_structure()))
+        return CompiledSeqPattern(self._len_tuple, self._pattern, self._parser, self._map_encode,
+                                  re.compile(regex_pattern), self.aligned, self._columns,
+                                  self._formula, self._literal_encode, self._parser.get_width(cap))
+
+    def _encode_sequence(self, sequence):
+        """Encode the 2-dimension sequence into a linear of string for matching the pattern"""
+        map_encode = self._map_encode
+        sentinel = self._sentinel
+        columns = self._columns
+        stack_encoded = []
+        if columns is None:
+            for n_tuple in sequence:
+                stack_encoded.append(sentinel)
+                for element in n_tuple:
+                    # string not presenting in the pattern needs not to be encoded
+                    stack_encoded.append(map_encode.get(element, '.'))
+        else:
+            # only the projected columns are encoded
+            for n_tuple in sequence:
+                stack_encoded.append(sentinel)
+                for column in columns:
+                    stack_encoded.append(map_encode.get(n_tuple[column], '.'))
+        return ''.join(stack_encoded)
+
+    def _match_object(self, match, sequence, group_offset=0, base=0):
+        """Locate a RE match object in the original sequence.
+
+        :param match: The RE match object
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :param group_offset: The index of the group in the RE match object,
+                             which is the entire match of this pattern
+        :param base: The offset of the encoded sequence in the string matched
+        :return: A SeqMatchObject Instance
+        """
+        # the spans of all groups in one call, which does not refer to the string matched
+        return SeqMatchObject(self, sequence, match.regs, group_offset, base)
+
+    def finditer(self, sequence):
+        """
+        Return an iterator yielding SeqMatchObject instances
+        over all non-overlapping matches for the SEQ RE pattern over the sequence of tuples.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: An iterator which generates a SeqMatchObject Instance
+        """
+        if len(sequence) < self._width[0]:
+            # too short to match, which needs not to be encoded
+            return
+        regex_string = self._encode_sequence(sequence)
+        for match in self._regex.finditer(regex_string):
+            yield self._match_object(match, sequence)
+
+    def search(self, sequence):
+        """Scan through the sequence of tuples looking for the first match.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: A SeqMatchObject Instance if match else None
+        """
+        return next(self.finditer(sequence), None)
+
+    def findall(self, sequence):
+        """Similar to the finditer() function.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: A list of SeqMatchObject Instance
+        """
+        return list(self.finditer(sequence))
+
+    @staticmethod
+    def _endpos(sequence, endpos):
+        """Clamp the end position into [0, len(sequence)], like the RE module."""
+        if endpos is None or endpos > len(sequence):
+            return len(sequence)
+        return max(endpos, 0)
+
+    def _encode_prefix(self, sequence, endpos):
+        """Encode the tuples before endpos only, since the RE never looks beyond endpos."""
+        if endpos < len(sequence):
+            sequence = sequence[:endpos]
+        return self._encode_sequence(sequence)
+
+    def match(self, sequence, pos=0, endpos=None):
+        """Match the pattern only at the beginning of the sequence of tuples, or at pos.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :param pos: The tuple index where the match starts
+        :param endpos: The tuple index beyond which the tuples are ignored, or None for the end
+        :return: A SeqMatchObject Instance if match else None
+        """
+        endpos = self._endpos(sequence, endpos)
+        if endpos - max(pos, 0) < self._width[0]:
+            return None
+        stride = self._stride
+        match = self._regex.match(self._encode_prefix(sequence, endpos), pos * stride,
+                                  endpos * stride)
+        return None if match is None else self._match_object(match, sequence)
+
+    def fullmatch(self, sequence, pos=0, endpos=None):
+        """Match the pattern against all the tuples of the sequence, or the ones in [pos, endpos).
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :param pos: The tuple index where the match starts
+        :param endpos: The tuple index where the match ends, or None for the end
+        :return: A SeqMatchObject Instance if match else None
+        """
+        endpos = self._endpos(sequence, endpos)
+        if endpos - max(pos, 0) < self._width[0]:
+            return None
+        stride = self._stride
+        regex_fullmatch = getattr(self._regex, 'fullmatch', None)
+        if regex_fullmatch is None:
+            # no fullmatch() before Python 3.4, and the RE module caches the RE compiled
+            regex_fullmatch = re.compile(r'(?:%s)\Z' % self._regex.pattern,
+                                         self._regex.flags).match
+        match = regex_fullmatch(self._encode_prefix(sequence, endpos), pos * stride,
+                                endpos * stride)
+        return None if match is None else self._match_object(match, sequence)
+
+    def finditer_spans(self, sequence):
+        """
+        Return an iterator yielding the span of each non-overlapping match
+        over the sequence of tuples, without making the SeqMatchObject.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: An iterator which generates (start, end) in the tuple indices
+        """
+        if len(sequence) < self._width[0]:
+            return
+        stride = self._stride
+        for match in self._regex.finditer(self._encode_sequence(sequence)):
+            start, end = match.span()
+            yield start // stride, end // stride
+
+    def count(self, sequence):
+        """Count the non-overlapping matches over the sequence of tuples.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: The number of matches
+        """
+        if len(sequence) < self._width[0]:
+            return 0
+        return sum(1 for _ in self._regex.finditer(self._encode_sequence(sequence)))
+
+    def contains(self, sequence):
+        """Check whether there is any match over the sequence of tuples.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: True if match else False
+        """
+        if len(sequence) < self._width[0]:
+            return False
+        return self._regex.search(self._encode_sequence(sequence)) is not None
+
+    def finditer_many(self, sequences):
+        """
+        Return an iterator yielding (sequence_index, SeqMatchObject)
+        over all non-overlapping matches in each sequence of a batch.
+
+        The per-call setup is paid once for the batch, and the sequences whose encoded string
+        does not satisfy the literal formula are skipped without running the RE.
+
+        :param sequences: An iterable of 2-dimensional Sequences (or the sequences of tuples)
+        :return: An iterator which generates (sequence_index, SeqMatchObject Instance)
+        """
+        return self._iter_many(sequences, False)
+
+    def search_many(self, sequences):
+        """
+        Return an iterator yielding (sequence_index, SeqMatchObject)
+        for the first match in each sequence of a batch,
+        and the sequences without any match are omitted.
+
+        :param sequences: An iterable of 2-dimensional Sequences (or the sequences of tuples)
+        :return: An iterator which generates (sequence_index, SeqMatchObject Instance)
+        """
+        return self._iter_many(sequences, True)
+
+    def _prefilter_chars(self):
+        """Get the sets of the encoded chars of the literals, in each of which at least one char
+        is present in the encoded string of any sequence matched,
+        which are the required literal sets, or else the cover of the formula.
+
+        Testing a few chars by the fast search in the string costs much less
+        than evaluating the whole formula, which is left to the RE.
+
+        :return: (frozenset of chars, ...), which is empty if nothing is required
+        """
+        formula = sp.Formula.translate(self._formula, self._map_encode)
+        char_sets = sp.Formula.required(formula)
+        if not char_sets:
+            cover = sp.Formula.cover(formula)
+            char_sets = [] if cover is None else [cover]
+        return tuple(char_sets)
+
+    def _iter_many(self, sequences, first_only):
+        """Match a batch of sequences, in which the lookups of methods are hoisted out of the loop.
+
+        :param sequences: An iterable of 2-dimensional Sequences (or the sequences of tuples)
+        :param first_only: Only yield the first match of each sequence if True
+        :return: An iterator which generates (sequence_index, SeqMatchObject Instance)
+        """
+        encode = self._encode_sequence
+        regex_finditer = self._regex.finditer
+        regex_search = self._regex.search
+        match_object = self._match_object
+        char_sets = self._prefilter_chars()
+        min_width = self._width[0]
+        checked = rejected = 0
+        for sequence_index, sequence in enumerate(sequences):
+            if len(sequence) < min_width:
+                continue
+            regex_string = encode(sequence)
+            if char_sets:
+                checked += 1
+                if checked == PREFILTER_SAMPLE and rejected * 8 < checked:
+                    char_sets = ()
+                if not _hits(char_sets, regex_string):
+                    rejected += 1
+                    continue
+            if first_only:
+                # no iterator is made for the first match only
+                match = regex_search(regex_string)
+                if match is not None:
+                    yield sequence_index, match_object(match, sequence)
+            else:
+                for match in regex_finditer(regex_string):
+                    yield sequence_index, match_object(match, sequence)
+
+    def _get_concat_regex(self):
+        """Get the RE matching the sequences concatenated by the separator,
+        in which `^` and `$` match at the boundaries of each sequence,
+        and the negative sets never match the separator.
+
+        :return: The ordinary regular expression object: RegexObject
+        """
+        regex = self._concat_regex
+        if regex is None:
+            sentinel = self._sentinel
+            regex_pattern = _align(_translate(self._parser.pattern_stack,
+                                              self._literal_encode.__getitem__,
+                                              sentinel=sentinel, columns=self._columns,
+                                              separator=SEPARATOR),
+                                   sentinel, _is_self_aligned(self._parser.get_structure()))
+            regex = re.compile(regex_pattern, re.M)
+            # a cache of the derived value, which is the same whichever thread compiles it
+            object.__setattr__(self, '_concat_regex', regex)
+        return regex
+
+    def finditer_concat(self, sequences, batch_size=1000):
+        """
+        Return an iterator yielding (sequence_index, SeqMatchObject)
+        over all non-overlapping matches in each sequence of a batch,
+        the same as finditer_many() does.
+
+        Every batch_size sequences are encoded into one string separated by the separator,
+        which is matched in one pass of the RE, and the match is located in its sequence
+        by a bisect over the offsets of the encoded sequences.
+
+        :param sequences: An iterable of 2-dimensional Sequences (or the sequences of tuples)
+        :param batch_size: The number of sequences concatenated into one string
+        :return: An iterator which generates (sequence_index, SeqMatchObject Instance)
+        """
+        regex_finditer = self._get_concat_regex().finditer
+        encode = self._encode_sequence
+        match_object = self._match_object
+        char_sets = self._prefilter_chars()
+        min_width = self._width[0]
+        checked = rejected = 0
+        iterator = iter(sequences)
+        index_base = 0
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                break
+            encoded_list = []
+            offsets = []  # the offset of each encoded sequence in the concatenated string
+            offset = 0
+            candidate = False  # whether any sequence of the batch is left to the RE
+            for sequence in batch:
+                # a sequence too short to match is left empty without encoding,
+                # in which nothing matches since any match consumes min_width > 0 tuples
+                regex_string = encode(sequence) if len(sequence) >= min_width else ''
+                if char_sets:
+                    checked += 1
+                    if checked == PREFILTER_SAMPLE and rejected * 8 < checked:
+                        char_sets = ()
+                    if not _hits(char_sets, regex_string):
+                        # nothing matches in it, nor in the empty string
+                        rejected += 1
+                        regex_string = ''
+                candidate = candidate or regex_string != ''
+                encoded_list.append(regex_string)
+                offsets.append(offset)
+                offset += len(regex_string) + 1
+            if candidate or not char_sets and min_width == 0:
+                regex_string = SEPARATOR.join(encoded_list)
+                for match in regex_finditer(regex_string):
+                    i = bisect.bisect_right(offsets, match.start()) - 1
+                    yield index_base + i, match_object(match, batch[i], base=offsets[i])
+            index_base += len(batch)
+
+    def is_useless_for(self, sequence):
+        """For preliminary screening the seq in advanced,
+        to check whether regular expression has no chance of success.
+
+        The sequence is useless if it is shorter than min_width,
+        or the literals in it do not satisfy the literal formula,
+        which is collected in one pass over the sequence.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples),
+                         or a set of the distinct strings in the sequence returned by token_set()
+        :return: True if SEQ RE no chance of success else False
+        """
+        formula = self._formula
+        # the fast path for the pre-tokenized sequence
+        if isinstance(sequence, (set, frozenset)):
+            return formula != sp.Formula.TRUE and not sp.Formula.evaluate(formula, sequence)
+        if len(sequence) < self._width[0]:
+            return True
+        if formula == sp.Formula.TRUE:
+            return False
+        literals = self._literals
+        hits = set()
+        for n_tuple in sequence:
+            for element in n_tuple:
+                if isinstance(element, string_types):
+                    if element in literals:
+                        hits.add(element)
+                elif hasattr(element, '__iter__'):
+                    # list, set
+                    hits.update(literals.intersection(element))
+                elif element in literals:
+                    hits.add(element)
+        return not sp.Formula.evaluate(formula, hits)
+
+
+class CompiledSeqTemplate(object):
+    """The SEQ RE pattern returned by SeqRegex.compile_template(),
+    in which each placeholder is encoded into a dedicated char of its slot.
+
+    Binding the values of placeholders only makes a new encoding dict,
+    in which the values are encoded into the char of their slot,
+    and the RE object is shared by all CompiledSeqPattern bound.
+    """
+
+    __slots__ = ('_compiled', '_placeholder_names', '_slot_chars', '_map_encode', '_plain')
+
+    def __init__(self, compiled, placeholder_names):
+        """Initialize a CompiledSeqTemplate instance.
+
+        :param compiled: The CompiledSeqPattern compiled with each placeholder as its own name
+        :param placeholder_names: The names of placeholders
+        """
+        # noinspection PyProtectedMember
+        map_encode = compiled._map_encode
+        self._compiled = compiled
+        self._placeholder_names = tuple(placeholder_names)
+        # the placeholders presenting in the pattern => the chars of their slots
+        self._slot_chars = dict((name, map_encode[name])
+                                for name in placeholder_names if name in map_encode)
+        # the encoding dict of the literals in the pattern
+        self._map_encode = dict((string, char) for string, char in map_encode.items()
+                                if string not in self._slot_chars)
+        # a back reference compares the encoded chars, which must not be shared by the values
+        # noinspection PyProtectedMember
+        self._plain = not any(flag == sp.Flags.EXT_SIGN and string == '?P='
+                              for flag, string, _ in compiled._parser.pattern_stack)
+
+    def __repr__(self):
+        return 'CompiledSeqTemplate(%d, %r)' % (self._compiled.len_tuple, self._compiled.pattern)
+
+    @property
+    def pattern(self):
+        """The original string of pattern"""
+        return self._compiled.pattern
+
+    @property
+    def placeholder_names(self):
+        """The names of placeholders"""
+        return self._placeholder_names
+
+    def bind(self, **placeholder_dict):
+        """Bind the values of placeholders without compiling the pattern again.
+
+        It is compiled again as usual only if a value is also a literal or the value
+        of another placeholder, a placeholder has no values, or there are back references.
+
+        :param placeholder_dict: {placeholder_name1: p1, placeholder_name2: p2}
+                                 in which p1, p2 could be a str or a list of str.
+        :return: A CompiledSeqPattern Instance
+        """
+        compiled = self._compiled
+        map_encode = dict(self._map_encode)
+        substitutions = dict()
+        plain = self._plain
+        for name in placeholder_dict:
+            if name not in self._slot_chars and name in map_encode:
+                # not declared as a placeholder, but presenting in the pattern
+                plain = False
+        for name, char in self._slot_chars.items():
+            if not plain:
+                break
+            if name in placeholder_dict:
+                values = sp.placeholder_values(placeholder_dict[name])
+            else:
+                # not bound, so the name is a literal
+                values = [name]
+            if len(values) == 0:
+                plain = False
+            for value in values:
+                if map_encode.setdefault(value, char) != char:
+                    plain = False
+            substitutions[name] = values
+        if not plain:
+            # noinspection PyProtectedMember
+            return SeqRegex(compiled.len_tuple, compiled.aligned)._compile_pattern(
+                compiled.pattern, placeholder_dict)
+        # noinspection PyProtectedMember
+        return CompiledSeqPattern(compiled.len_tuple, compiled.pattern, compiled._parser,
+                                  map_encode, compiled.regex, compiled.aligned,
+                                  compiled._columns,
+                                  sp.Formula.expand(compiled.literal_formula, substitutions),
+                                  compiled._map_encode, compiled._width)
+
+
+class SeqMatchObject(object):
+    """The class manages the match results that the CompiledSeqPattern returned,
+    and the matched group can be acquired by the group_list or named_group_dict.
+
+    Only the spans of the RE match are kept, and the subsequence of a group
+    is sliced from the sequence on demand and cached,
+    so a match is cheap if only a few groups are read.
+    """
+
+    __slots__ = ('sq_re', '_sequence', '_regs', '_group_offset', '_base', '_groups',
+                 '_group_list', '_named_group_dict')
+
+    def __init__(self, compiled, sequence, regs, group_offset=0, base=0):
+        """Initialize a SeqMatchObject instance.
+
+        :param compiled: The CompiledSeqPattern Instance
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :param regs: The spans of all groups of the RE match object in the encoded string
+        :param group_offset: The index of the group in regs, which is the entire match
+        :param base: The offset of the encoded sequence in the string matched
+        """
+        # public member
+        self.sq_re = compiled
+        """The CompiledSeqPattern Instance which returned this SeqMatchObject Instance"""
+        self._sequence = sequence
+        self._regs = regs
+        self._group_offset = group_offset
+        self._base = base
+        self._groups = dict()  # group_index => the subsequence sliced
+        self._group_list = None
+        self._named_group_dict = None
+
+    def _group_index(self, group):
+        if isinstance(group, int):
+            if not 0 <= group <= self.sq_re.regex.groups:
+                raise IndexError('no such group')
+            return group
+        try:
+            return self.sq_re.regex.groupindex[group]
+        except KeyError:
+            raise IndexError('no such group')
+
+    def span(self, group=0):
+        """Get the span of a group in the tuple indices of the sequence.
+
+        :param group: The group index or name
+        :return: (start, end), or (-1, -1) if the group did not participate in the match
+        """
+        group_index = self._group_index(group)
+        start, end = self._regs[self._group_offset + group_index]
+        if start >= 0:
+            # noinspection PyProtectedMember
+            stride = self.sq_re._stride
+            start = (start - self._base) // stride
+            end = (end - self._base) // stride
+        return start, end
+
+    def group(self, group=0):
+        """Get the subsequence of tuples matched by a group.
+
+        :param group: The group index or name
+        :return: A slice of the sequence, which is empty if the group did not participate
+        """
+        group_index = self._group_index(group)
+        if group_index not in self._groups:
+            start, end = self.span(group_index)
+            self._groups[group_index] = self._sequence[start:end]
+        return self._groups[group_index]
+
+    @property
+    def group_list(self):
+        """All indexed groups matched in a result, including named and unnamed groups:
+        [(group_index, subsequence, start, end), ...]"""
+        if self._group_list is None:
+            # noinspection PyProtectedMember
+            stride = self.sq_re._stride
+            base = self._base
+            sequence = self._sequence
+            groups = self._groups
+            group_list = []
+            # The entire match (group_index = 0) and Parenthesized subgroups
+            for group_index in range(self.sq_re.regex.groups + 1):
+                start, end = self._regs[self._group_offset + group_index]
+                if start >= 0:
+                    start = (start - base) // stride
+                    end = (end - base) // stride
+                if group_index not in groups:
+                    groups[group_index] = sequence[start:end]
+                group_list.append((group_index, groups[group_index], start, end))
+            self._group_list = group_list
+        return self._group_list
+
+    @property
+    def named_group_dict(self):
+        """All named groups matched in a result:
+        {group_name: (group_index, subsequence, start, end)}"""
+        if self._named_group_dict is None:
+            # group_index is needed to sort the named groups in order
+            self._named_group_dict = dict((group_name, self.group_list[group_index])
+                                          for group_name, group_index
+                                          in self.sq_re.regex.groupindex.items())
+        return self._named_group_dict
+
+    def format_group_to_str(self, group_name, trimmed=True):
+        """Output a named group matched in the result, according the format string
+        indicated after the group name in the original pattern string.
+
+        :param group_name: The group name
+        :param trimmed: Remove the group name and parentheses if trimmed == True else keep them
+        :return: A string of the matched result
+        """
+        formatted_str_list = []
+
+        def formatter(n_tuple):
+            formatted_str = ';'.join(['|'.join(unicode_str(values))
+                                      if hasattr(values, '__iter__') else
+                                      unicode_str(values) for values in
+                                      n_tuple])  # support multi-value element
+            formatted_str = formatted_str.rstrip(';')
+            if len(formatted_str) > 0:
+                return '[%s]' % formatted_str
+            else:
+                return '.'
+
+        if group_name in self.sq_re.regex.groupindex:
+            match_sequence = self.group(group_name)
+            if group_name in self.sq_re.named_group_format_indices:
+                format_indices = self.sq_re.named_group_format_indices[group_name]
+                if format_indices is not None:
+                    for match_tuple in match_sequence:
+                        formatted_tuple = [''] * self.sq_re.len_tuple
+                        for low, high in format_indices:
+                            formatted_tuple[low: high] = match_tuple[low: high]
+                        formatted_str_list.append(formatter(formatted_tuple))
+                else:
+                    # `@@` => get pattern itself
+                    pattern_sub = self.sq_re.get_pattern_by_name(group_name)
+                    # `(?:P<name@@>pattern_sub)`
+                    if trimmed:
+                        # `pattern_sub`
+                        pattern_sub = pattern_sub[pattern_sub.find('>') + 1: -1]
+                    formatted_str_list.append(pattern_sub)
+            else:
+                # default formatter
+                for match_tuple in match_sequence:
+                    formatted_str_list.append(formatter(match_tuple))
+        return ' '.join(formatted_str_list)
+
+
+# keep the former names of the nested classes
+SeqRegex.SeqRegexObject = CompiledSeqPattern
+SeqRegex.SeqMatchObject = SeqMatchObject
@@ -0,0 +1,173 @@
+# coding:utf-8
+
+"""
+Match a corpus of sequences by a pool of processes
+==================================================
+
+The RE engine holds the GIL, so a compiled SEQ RE pattern can only use one core
+in a process. parallel_finditer() distributes the chunks of sequences
+to a pool of worker processes, in which the compiled pattern is sent to each worker
+once by the initializer of the pool, rather than with every chunk.
+
+>>> import seq_re
+>>> compiled = seq_re.SeqRegex(2).compile('(?P<company>[;nc]) .{0,3} [保荐|担任]')
+>>> for sequence_index, spans in seq_re.parallel_finditer(compiled, sequences, workers=4):
+>>>     start, end = spans[0]
+>>>     print(sequence_index, sequences[sequence_index][start:end])
+
+A match is returned as a compact span record ``(sequence_index, spans)``,
+in which ``spans[group_index] = (start, end)`` in the tuple indices of the sequence,
+the same as ``group_list[group_index][2:]`` of the SeqMatchObject,
+and the index of a named group is given by ``compiled.regex.groupindex``.
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import collections
+import itertools
+import multiprocessing
+
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Python 2
+    # noinspection PyUnresolvedReferences
+    import Queue as queue
+
+DEFAULT_CHUNKSIZE = 256
+
+_worker_pattern = None  # the compiled pattern of the worker process
+
+
+def _init_worker(compiled):
+    """Keep the compiled pattern in the worker process."""
+    global _worker_pattern
+    _worker_pattern = compiled
+
+
+def _match_chunk(chunk, compiled=None):
+    """Match a chunk of sequences.
+
+    :param chunk: (the index of the first sequence, [sequence, ...])
+    :param compiled: The CompiledSeqPattern object, or None to use the one of the worker
+    :return: A list of span records: [(sequence_index, ((start, end), ...)), ...]
+    """
+    if compiled is None:
+        compiled = _worker_pattern
+    index_base, sequences = chunk
+    # only the spans are read, and the subsequences of groups are never sliced
+    group_indices = range(compiled.regex.groups + 1)
+    return [(index_base + i, tuple(match.span(group_index) for group_index in group_indices))
+            for i, match in compiled.finditer_many(sequences)]
+
+
+def _chunks(sequences, chunksize):
+    """Split the sequences into chunks lazily.
+
+    :return: An iterator which generates (the index of the first sequence, [sequence, ...])
+    """
+    iterator = iter(sequences)
+    index_base = 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            break
+        yield index_base, chunk
+        index_base += len(chunk)
+
+
+def _call_chunk(func, chunk):
+    """Apply the function to a chunk in the worker process,
+    in which the exception is returned, so that the callback of completion is always called.
+
+    :return: (the result of the chunk, None) or (None, the exception raised)
+    """
+    try:
+        return func(chunk), None
+    except Exception as e:
+        return None, e
+
+
+def _get_result(async_result):
+    """Get the result of a chunk finished, and raise the exception of the worker if any."""
+    result, error = async_result.get()
+    if error is not None:
+        raise error
+    return result
+
+
+def _map_chunks(func, chunks, workers, initializer, initargs, ordered=True):
+    """Apply a function to each chunk by a pool of processes,
+    in which only a few chunks for each worker are in progress.
+
+    :param func: The function of a chunk, which is defined at the top level of a module
+    :param chunks: An iterable of chunks
+    :param workers: The number of worker processes
+    :param initializer: The function to initialize each worker process
+    :param initargs: The arguments of the initializer, which are pickled once for each worker
+    :param ordered: Yield the results in the order of chunks if True,
+                    else in the order the chunks are finished
+    :return: An iterator which generates the result of each chunk
+    """
+    window = workers * 2  # the max number of chunks in progress
+    pool = multiprocessing.Pool(workers, initializer=initializer, initargs=initargs)
+    try:
+        if ordered:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_call_chunk, (func, chunk)))
+                if len(pending) >= window:
+                    yield _get_result(pending.popleft())
+            while pending:
+                yield _get_result(pending.popleft())
+        else:
+            pending = dict()  # the key of chunk => AsyncResult
+            finished = queue.Queue()  # the keys of the chunks finished, put by the callbacks
+            for key, chunk in enumerate(chunks):
+                pending[key] = pool.apply_async(_call_chunk, (func, chunk),
+                                                callback=lambda _, key=key: finished.put(key))
+                if len(pending) >= window:
+                    yield _get_result(pending.pop(finished.get()))
+            while pending:
+                yield _get_result(pending.pop(finished.get()))
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def parallel_finditer(compiled, sequences, workers=None, chunksize=DEFAULT_CHUNKSIZE,
+                      ordered=True):
+    """
+    Return an iterator yielding the span records over all non-overlapping matches
+    for the compiled pattern over each sequence, which are found by a pool of processes.
+
+    The sequences are consumed lazily, and only a few chunks for each worker are in progress,
+    so that the memory is bounded while iterating a large corpus.
+
+    :param compiled: The CompiledSeqPattern object, which is pickled once for each worker
+    :param sequences: An iterable of 2-dimensional Sequences (or the sequences of tuples)
+    :param workers: The number of worker processes, or None for the number of CPUs,
+                    and 1 matches in the current process without a pool
+    :param chunksize: The number of sequences sent to a worker at a time
+    :param ordered: Yield the records in the order of sequences if True,
+                    else in the order the chunks are finished
+    :return: An iterator which generates (sequence_index, ((start, end), ...))
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers < 1 or chunksize < 1:
+        raise ValueError('invalid number of workers or chunk size')
+    if workers == 1:
+        results = (_match_chunk(chunk, compiled) for chunk in _chunks(sequences, chunksize))
+    else:
+        results = _map_chunks(_match_chunk, _chunks(sequences, chunksize), workers,
+                              _init_worker, (compiled,), ordered)
+    for records in results:
+        for record in records:
+            yield record
@@ -59,6 +59,8 @@ extend
 WPXXX
 """
 
+import warnings
+
 
 class Flags(object):
     """The functional flags of the parsed pattern part"""
@@ -78,6 +80,38 @@ class Flags(object):
     LITERAL = 'LITERAL'  # need to be encoded
 
 
+def placeholder_values(placeholder_set):
+    """Get the list of substitutions of a placeholder.
+
+    :param placeholder_set: The value in placeholder_dict, a str or a list of str
+    :return: [substitutions of str type]
+    """
+    str_list = []
+    if hasattr(placeholder_set, '__iter__'):
+        # list, set
+        str_list.extend(placeholder_set)
+    else:
+        # a single string
+        str_list.append(placeholder_set)
+    return str_list
+
+
+class Nodes(object):
+    """The node types of the parsed structure"""
+    TUPLE = 'TUPLE'  # (TUPLE, (element, ...)), in which element is one of the following
+    ANY = 'ANY'  # (ANY,)  element matches any string
+    IN = 'IN'  # (IN, frozenset([str, ...]))  element matches a string in the set
+    NOT_IN = 'NOT_IN'  # (NOT_IN, frozenset([str, ...]))  element matches a string not in the set
+    GROUP = 'GROUP'  # (GROUP, [branch, ...]), in which branch = [node, ...]
+    ASSERT = 'ASSERT'  # (ASSERT, [branch, ...])  lookahead or lookbehind assertion
+    NOT_ASSERT = 'NOT_ASSERT'  # (NOT_ASSERT, [branch, ...])  negative assertion
+    COND = 'COND'  # (COND, [yes_branch, no_branch])  conditional back reference group
+    BACKREF = 'BACKREF'  # (BACKREF, name)  named back reference
+    REPEAT = 'REPEAT'  # (REPEAT, node, min, max)  max is None if unbounded
+    ANCHOR = 'ANCHOR'  # (ANCHOR, `^` or `$`)
+    OPAQUE = 'OPAQUE'  # (OPAQUE, char)  any other char of ordinary RE
+
+
 class SeqRegexParser(object):
     """The class wraps the parse function, and manages the states of the global variables."""
 
@@ -114,6 +148,11 @@ class SeqRegexParser(object):
         """The original string of pattern"""
         return self._pattern_str
 
+    @property
+    def pattern_stack(self):
+        """The queue of substrings of pattern, which has been parsed"""
+        return self._pattern_stack
+
     @classmethod
     def _parse_indices(cls, indices_string):
         """Parse the format string.
@@ -183,16 +222,8 @@ class SeqRegexParser(object):
         :param placeholder_name: string
         :return: [substitutions of str type]
         """
-        str_list = []
         # placeholder name
-        placeholder_set = self._placeholder_dict.get(placeholder_name, placeholder_name)
-        if hasattr(placeholder_set, '__iter__'):
-            # list, set
-            str_list.extend(placeholder_set)
-        else:
-            # a single string
-            str_list.append(placeholder_set)
-        return str_list
+        return placeholder_values(self._placeholder_dict.get(placeholder_name, placeholder_name))
 
     def _parse_element(self, negative_flag, element_set):
         """Parse the element as the following:
@@ -633,8 +664,13 @@ class SeqRegexParser(object):
     def get_positive_literal_sets(self):
         """Get literals grouped by sets which do not have negative sign.
 
+        Deprecated: the sets in the optional or alternative parts of the pattern
+        are not required by a match, use get_required_literal_sets() instead.
+
         :return: literal_set_list = ['str', ['str', 'str'], ....]
         """
+        warnings.warn('get_positive_literal_sets() is deprecated, '
+                      'use get_required_literal_sets() instead', DeprecationWarning, stacklevel=2)
         # sets come after ?! ?<! => - - = + , - + = -
         literal_set_list = []
         positive = True
@@ -665,6 +701,381 @@ class SeqRegexParser(object):
                 positive = True
         return literal_set_list
 
+    def _parse_tuple_node(self, ix):
+        """Transform the parsed tuple starting at ix into a node.
+
+        :param ix: The index of TUPLE_START in the pattern stack
+        :return: ((TUPLE, (element, ...)), the index of TUPLE_END)
+        """
+        parsed = self._pattern_stack
+        elements = []
+        ix += 1
+        while parsed[ix][0] != Flags.TUPLE_END:
+            flag, string, _ = parsed[ix]
+            if flag == Flags.LITERAL:
+                elements.append((Nodes.IN, frozenset([string])))
+            elif flag == Flags.EXP:
+                # `.` of an element, or `..` of the vacancy at the tail
+                elements.extend([(Nodes.ANY,)] * len(string))
+            elif flag == Flags.SET_START:
+                negatived = False
+                literals = set()
+                ix += 1
+                while parsed[ix][0] != Flags.SET_END:
+                    if parsed[ix][0] == Flags.SET_NEG:
+                        negatived = True
+                    else:
+                        literals.add(parsed[ix][1])
+                    ix += 1
+                elements.append((Nodes.NOT_IN if negatived else Nodes.IN, frozenset(literals)))
+            ix += 1
+        return (Nodes.TUPLE, tuple(elements)), ix
+
+    @classmethod
+    def _parse_quantifier(cls, parsed, ix):
+        """Parse the quantifier starting at ix.
+
+        :param parsed: The pattern stack
+        :param ix: The index of `*`, `+`, `?` or `{`
+        :return: (min, max, the index of the end of quantifier) or None if not a quantifier
+        """
+        string = parsed[ix][1]
+        if string == '*':
+            low, high = 0, None
+        elif string == '+':
+            low, high = 1, None
+        elif string == '?':
+            low, high = 0, 1
+        else:
+            # `{m}` `{m,}` `{,n}` `{m,n}`
+            chars = []
+            end = ix + 1
+            while end < len(parsed) and parsed[end][0] == Flags.EX and parsed[end][1] != '}':
+                chars.append(parsed[end][1])
+                end += 1
+            if end >= len(parsed) or parsed[end][0] != Flags.EX:
+                return None
+            items = ''.join(chars).split(',')
+            if len(items) > 2 or not all(item.isdigit() or item == '' for item in items):
+                return None
+            if len(items) == 1:
+                if items[0] == '':
+                    return None
+                low = high = int(items[0])
+            else:
+                if items[0] == '' and items[1] == '':
+                    return None
+                low = int(items[0]) if items[0] else 0
+                high = int(items[1]) if items[1] else None
+            ix = end
+        # the lazy quantifier `*?` `+?` `??` `{m,n}?`
+        if ix + 1 < len(parsed) and parsed[ix + 1][0] == Flags.EX and parsed[ix + 1][1] == '?':
+            ix += 1
+        return low, high, ix
+
+    def get_structure(self):
+        """Transform self._pattern_stack into a tree of nodes for the static analysis.
+
+        :return: [branch, ...], in which branch = [node, ...] and node is one of Nodes
+        """
+        parsed = self._pattern_stack or []
+        frames = [[None, [[]]]]  # [[group type, [branch, ...]], ...] the outermost first
+        ix = 0
+        while ix < len(parsed):
+            flag, string, _ = parsed[ix]
+            branch = frames[-1][1][-1]
+            if flag == Flags.TUPLE_START:
+                node, ix = self._parse_tuple_node(ix)
+                branch.append(node)
+            elif flag == Flags.EXP:
+                # `.` out of the tuple => `(?:...)`
+                branch.append((Nodes.TUPLE, ((Nodes.ANY,),) * self._len_tuple))
+            elif flag in (Flags.GROUP_START, Flags.EXT_START):
+                node_type = Nodes.GROUP
+                if ix + 1 < len(parsed) and parsed[ix + 1][0] == Flags.EXT_SIGN:
+                    ix += 1
+                    sign = parsed[ix][1]
+                    if sign in ('?=', '?<='):
+                        node_type = Nodes.ASSERT
+                    elif sign in ('?!', '?<!'):
+                        node_type = Nodes.NOT_ASSERT
+                    elif sign == '?P<':
+                        ix += 2  # name and `>`
+                    elif sign == '?(':
+                        node_type = Nodes.COND
+                        ix += 2  # name and `)`
+                    elif sign == '?P=':
+                        ix += 2  # name and `)`
+                        branch.append((Nodes.BACKREF, parsed[ix - 1][1]))
+                        ix += 1
+                        continue
+                frames.append([node_type, [[]]])
+            elif flag in (Flags.GROUP_END, Flags.EXT_END):
+                node_type, branches = frames.pop(-1)
+                frames[-1][1][-1].append((node_type, branches))
+            elif string == '|':
+                frames[-1][1].append([])
+            elif string in '^$':
+                branch.append((Nodes.ANCHOR, string))
+            elif string in '*+?{' and len(branch) > 0:
+                quantifier = self._parse_quantifier(parsed, ix)
+                if quantifier is None:
+                    branch.append((Nodes.OPAQUE, string))
+                else:
+                    low, high, ix = quantifier
+                    branch[-1] = (Nodes.REPEAT, branch[-1], low, high)
+            else:
+                branch.append((Nodes.OPAQUE, string))
+            ix += 1
+        return frames[0][1]
+
+    def get_literal_formula(self):
+        """Get the boolean formula of literals that any match must satisfy.
+
+        The formula is AND over the sequence of nodes, OR over the alternation,
+        and the literals under the negative sign, the negative assertion
+        and the quantifier whose minimum is zero are dropped (always true).
+
+        :return: (Formula.IN, column, frozenset(['str', ...]))
+                 or (Formula.AND, (formula, ...)) or (Formula.OR, (formula, ...))
+        """
+        def formula_of_node(node):
+            node_type = node[0]
+            if node_type == Nodes.TUPLE:
+                return Formula.all_of([(Formula.IN, column, element[1])
+                                       for column, element in enumerate(node[1])
+                                       if element[0] == Nodes.IN])
+            elif node_type in (Nodes.GROUP, Nodes.ASSERT, Nodes.COND):
+                # the conditional group matches either the yes branch or the no branch
+                branches = node[1] if node_type != Nodes.COND or len(node[1]) > 1 else [[]]
+                return formula_of_branches(branches)
+            elif node_type == Nodes.REPEAT and node[2] > 0:
+                return formula_of_node(node[1])
+            else:
+                return Formula.TRUE
+
+        def formula_of_branches(branches):
+            return Formula.any_of([Formula.all_of([formula_of_node(node) for node in branch])
+                                   for branch in branches])
+
+        return formula_of_branches(self.get_structure())
+
+    def get_required_literal_sets(self):
+        """Get the literal sets that any match must contain,
+        which is, one literal at least of each set must be present in the matched sequence.
+
+        They are the literal sets joined by AND at the top of get_literal_formula().
+
+        :return: literal_set_list = [frozenset(['str', 'str']), ....]
+        """
+        return Formula.required(self.get_literal_formula())
+
+    def get_width(self, cap=None, lookaround=False):
+        """Get the min and max numbers of tuples spanned by any match of the pattern.
+
+        A back reference spans no more tuples than the widest match of the whole pattern
+        without back references, and an unknown char of ordinary RE makes it unbounded.
+
+        :param cap: The max number of repeats of the unbounded quantifiers, or None if unlimited
+        :param lookaround: Count the tuples looked at by the assertions into the max width
+        :return: (min_width, max_width), in which max_width is None if unbounded
+        """
+        def width_of_node(node, looking, backref):
+            node_type = node[0]
+            if node_type == Nodes.TUPLE:
+                return 1, 1
+            elif node_type == Nodes.GROUP:
+                return width_of_branches(node[1], looking, backref)
+            elif node_type == Nodes.COND:
+                # the missing no branch matches nothing
+                branches = node[1] if len(node[1]) > 1 else node[1] + [[]]
+                return width_of_branches(branches, looking, backref)
+            elif node_type in (Nodes.ASSERT, Nodes.NOT_ASSERT):
+                return 0, width_of_branches(node[1], looking, backref)[1] if looking else 0
+            elif node_type == Nodes.REPEAT:
+                low, high = width_of_node(node[1], looking, backref)
+                repeats = node[3]
+                if repeats is None and cap is not None:
+                    repeats = max(node[2], cap)
+                if high == 0:
+                    return 0, 0
+                elif high is None or repeats is None:
+                    return low * node[2], None
+                return low * node[2], high * repeats
+            elif node_type == Nodes.BACKREF:
+                return 0, backref
+            elif node_type == Nodes.ANCHOR:
+                return 0, 0
+            else:
+                # OPAQUE
+                return 0, None
+
+        def width_of_branches(branches, looking, backref):
+            low_list = []
+            high_list = []
+            for branch in branches:
+                low, high = 0, 0
+                for node in branch:
+                    node_low, node_high = width_of_node(node, looking, backref)
+                    low += node_low
+                    high = None if high is None or node_high is None else high + node_high
+                low_list.append(low)
+                high_list.append(high)
+            return min(low_list), None if None in high_list else max(high_list)
+
+        structure = self.get_structure()
+        # any group referred is a part of the pattern, looked at or consumed
+        backref_width = width_of_branches(structure, True, 0)[1]
+        return width_of_branches(structure, lookaround, backref_width)
+
+    def get_referenced_columns(self):
+        """Get the columns of tuple constrained by any element of the pattern,
+        and the other columns are always matched by `.`.
+
+        :return: A sorted list of column indices
+        """
+        columns = set()
+
+        def walk(node):
+            node_type = node[0]
+            if node_type == Nodes.TUPLE:
+                for column, element in enumerate(node[1]):
+                    if element[0] != Nodes.ANY:
+                        columns.add(column)
+            elif node_type == Nodes.REPEAT:
+                walk(node[1])
+            elif node_type in (Nodes.GROUP, Nodes.ASSERT, Nodes.NOT_ASSERT, Nodes.COND):
+                for node_branch in node[1]:
+                    for child in node_branch:
+                        walk(child)
+
+        for branch in self.get_structure():
+            for top_node in branch:
+                walk(top_node)
+        return sorted(columns)
+
+
+class Formula(object):
+    """The boolean formula of literals required by a pattern"""
+    IN = 'IN'  # (IN, column, frozenset(['str', ...]))  one of the literals at the column
+    AND = 'AND'  # (AND, (formula, ...))
+    OR = 'OR'  # (OR, (formula, ...))
+    TRUE = (AND, ())  # always true
+
+    @classmethod
+    def all_of(cls, formula_list):
+        """Join the formulas by AND, in which the nested AND is flattened."""
+        items = []
+        for formula in formula_list:
+            if formula[0] == cls.AND:
+                items.extend(formula[1])
+            else:
+                items.append(formula)
+        return items[0] if len(items) == 1 else (cls.AND, tuple(items))
+
+    @classmethod
+    def any_of(cls, formula_list):
+        """Join the formulas by OR, which is always true if any formula is always true."""
+        items = []
+        for formula in formula_list:
+            if formula == cls.TRUE:
+                return cls.TRUE
+            elif formula[0] == cls.OR:
+                items.extend(formula[1])
+            else:
+                items.append(formula)
+        return items[0] if len(items) == 1 else (cls.OR, tuple(items))
+
+    @classmethod
+    def evaluate(cls, formula, tokens):
+        """Check whether a set of strings satisfies the formula.
+
+        :param formula: The formula returned by get_literal_formula()
+        :param tokens: A set of strings
+        :return: True if satisfied else False
+        """
+        if formula[0] == cls.IN:
+            return not formula[2].isdisjoint(tokens)
+        elif formula[0] == cls.AND:
+            return all(cls.evaluate(item, tokens) for item in formula[1])
+        else:
+            return any(cls.evaluate(item, tokens) for item in formula[1])
+
+    @classmethod
+    def required(cls, formula):
+        """Get the literal sets joined by AND at the top of the formula.
+
+        :param formula: The formula returned by get_literal_formula()
+        :return: literal_set_list = [frozenset(['str', 'str']), ....]
+        """
+        if formula[0] == cls.IN:
+            return [formula[2]]
+        elif formula[0] == cls.AND:
+            return [item[2] for item in formula[1] if item[0] == cls.IN]
+        else:
+            return []
+
+    @classmethod
+    def literals(cls, formula):
+        """Get all literals in the formula.
+
+        :param formula: The formula returned by get_literal_formula()
+        :return: A set of strings
+        """
+        if formula[0] == cls.IN:
+            return set(formula[2])
+        literals = set()
+        for item in formula[1]:
+            literals.update(cls.literals(item))
+        return literals
+
+    @classmethod
+    def translate(cls, formula, mapping):
+        """Substitute each literal in the formula, and the literals not in the mapping are dropped.
+
+        :param formula: The formula returned by get_literal_formula()
+        :param mapping: A dict from literal to its substitution, e.g. the encoding dict
+        :return: The formula of substitutions
+        """
+        if formula[0] == cls.IN:
+            return (cls.IN, formula[1],
+                    frozenset(mapping[literal] for literal in formula[2] if literal in mapping))
+        return (formula[0], tuple(cls.translate(item, mapping) for item in formula[1]))
+
+    @classmethod
+    def expand(cls, formula, substitutions):
+        """Substitute each literal in the formula by a set of literals.
+
+        :param formula: The formula returned by get_literal_formula()
+        :param substitutions: {literal: set of literals}, and the other literals are kept
+        :return: The formula expanded
+        """
+        if formula[0] == cls.IN:
+            literals = set()
+            for literal in formula[2]:
+                literals.update(substitutions.get(literal, (literal,)))
+            return (cls.IN, formula[1], frozenset(literals))
+        return (formula[0], tuple(cls.expand(item, substitutions) for item in formula[1]))
+
+    @classmethod
+    def cover(cls, formula):
+        """Get a set of literals, one of which at least must be present in any match.
+
+        :param formula: The formula returned by get_literal_formula()
+        :return: A frozenset of strings, or None if there is no such set
+        """
+        if formula[0] == cls.IN:
+            return formula[2]
+        covers = [cls.cover(item) for item in formula[1]]
+        if formula[0] == cls.AND:
+            # the smallest one
+            covers = [literals for literals in covers if literals is not None]
+            return min(covers, key=len) if covers else None
+        else:
+            if len(covers) == 0 or None in covers:
+                return None
+            return frozenset().union(*covers)
+
 
 class Tokenizer(object):
     """The class to help iterate the chars of original string of pattern"""
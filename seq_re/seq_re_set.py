@@ -0,0 +1,274 @@
+# coding:utf-8
+
+"""
+Match a set of sequence regular express patterns
+================================================
+
+Many SEQ RE patterns (rules) are usually matched against the same sequence.
+PatternSet compiles all the rules with one shared vocabulary,
+so that each sequence is encoded only once for all of them.
+
+Examples
+--------
+
+>>> import seq_re
+>>> rules = [('company', '[;nc]+'),
+>>>          ('action', '([;nc]) .{0,3} ([verb])', {'verb': ['保荐', '担任']})]
+>>> pattern_set = seq_re.PatternSet(2, rules)
+>>> for rule_id, match in pattern_set.finditer(sequence):
+>>>     print(rule_id, match.group_list[0][2:])
+
+PatternSet.finditer() matches every rule independently,
+so its results are the same as the ones of each rule's own finditer().
+PatternSet.scan() runs all the rules in one pass as a combined RE with tagged alternatives,
+and yields the leftmost non-overlapping matches among all the rules,
+in which the rule listed earlier wins if several rules match at the same position.
+
+Before matching, the rules are routed by an inverted index from literals to rules,
+which is built by the literal formula that every match of a rule must satisfy,
+so that only the rules which could possibly match will be run against a sequence.
+
+A back reference ``(?P=name)`` compares the encoded tuples,
+in which the strings not presenting in the rule are all encoded into the same char,
+so a rule with back references keeps its own vocabulary and encoding,
+and it is not supported by PatternSet.scan().
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import re
+
+from . import seq_re_main
+from . import seq_re_parse as sp
+
+
+def _has_back_reference(compiled):
+    """Check whether a compiled pattern contains any back reference `(?P=name)`."""
+    # noinspection PyProtectedMember
+    for flag, string, _ in compiled._parser.pattern_stack:
+        if flag == sp.Flags.EXT_SIGN and string == '?P=':
+            return True
+    return False
+
+
+class PatternSet(object):
+    """The class compiles a set of SEQ RE patterns against one shared vocabulary."""
+
+    def __init__(self, len_tuple, rules, aligned=True):
+        """Initialize a PatternSet instance.
+
+        :param len_tuple: The length of the tuple
+        :param rules: {rule_id: pattern} or [(rule_id, pattern), ...]
+                      or [(rule_id, pattern, placeholder_dict), ...]
+        :param aligned: Start a match only at the boundary of tuples if True
+        """
+        if isinstance(rules, dict):
+            rules = rules.items()
+        compiler = seq_re_main.SeqRegex(len_tuple, aligned)
+        self._len_tuple = len_tuple
+        self._aligned = aligned
+        self._rule_ids = []  # the ids of rules in order
+        self._compiled_list = []  # the CompiledSeqPattern objects of rules in order
+        self._private_indices = set()  # the indices of rules which keep their own vocabulary
+        for rule in rules:
+            if len(rule) == 2:
+                rule_id, pattern = rule
+                placeholder_dict = dict()
+            elif len(rule) == 3:
+                rule_id, pattern, placeholder_dict = rule
+            else:
+                raise ValueError('invalid rule `%r`' % (rule,))
+            if rule_id in self._rule_ids:
+                raise ValueError('duplicate rule id `%r`' % (rule_id,))
+            # all rules extend the same encoding dict of the compiler
+            compiled = compiler._compile_pattern(pattern, placeholder_dict)
+            if _has_back_reference(compiled):
+                compiled = seq_re_main.SeqRegex(len_tuple, aligned).compile(pattern,
+                                                                            **placeholder_dict)
+                self._private_indices.add(len(self._rule_ids))
+            self._rule_ids.append(rule_id)
+            self._compiled_list.append(compiled)
+        self._columns = self._project()
+        self._compiled_dict = dict(zip(self._rule_ids, self._compiled_list))
+        # a sequence shorter than the min width of all rules matches none of them
+        self._min_width = min([compiled.min_width for compiled in self._compiled_list] or [0])
+        self._index, self._unindexed = self._build_index()
+        self._scanner, self._scanner_groups = self._compile_scanner()
+
+    def _project(self):
+        """Project the rules sharing the vocabulary onto the union of their referenced columns,
+        so that they share the same encoded sequence.
+
+        :return: The projected columns of tuple, or None if all columns
+        """
+        shared_indices = [i for i in range(len(self._compiled_list))
+                          if i not in self._private_indices]
+        union = set()
+        for i in shared_indices:
+            union.update(self._compiled_list[i].columns)
+        union = tuple(sorted(union))
+        columns = union if len(union) < self._len_tuple else None
+        for i in shared_indices:
+            compiled = self._compiled_list[i]
+            if compiled.columns != union:
+                # noinspection PyProtectedMember
+                self._compiled_list[i] = compiled._project(columns)
+        return columns
+
+    def _build_index(self):
+        """Build the inverted index from literals to the rules which require them.
+
+        :return: ({literal: [rule index, ...]}, [index of rule without required literals, ...])
+        """
+        index = dict()
+        unindexed = []
+        for i, compiled in enumerate(self._compiled_list):
+            literals = sp.Formula.cover(compiled.literal_formula)
+            if literals is not None:
+                for literal in literals:
+                    index.setdefault(literal, []).append(i)
+            else:
+                unindexed.append(i)
+        return index, unindexed
+
+    def _route(self, tokens):
+        """Find the indices of rules which could possibly match a sequence.
+
+        :param tokens: The set of distinct strings in the sequence
+        :return: A sorted list of rule indices
+        """
+        index = self._index
+        candidates = set(self._unindexed)
+        for token in tokens:
+            if token in index:
+                candidates.update(index[token])
+        return sorted(i for i in candidates
+                      if sp.Formula.evaluate(self._compiled_list[i].literal_formula, tokens))
+
+    def candidates(self, sequence):
+        """Find the rules which could possibly match the sequence by the inverted index.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: A list of rule ids
+        """
+        return [self._rule_ids[i] for i in self._route(seq_re_main.token_set(sequence))]
+
+    def _compile_scanner(self):
+        """Combine all rules into one RE with a tagged alternative for each rule.
+
+        :return: (RE object, {the group index of alternative: the index of rule})
+        """
+        if not self._compiled_list or self._private_indices:
+            return None, dict()
+        alternative_list = []
+        scanner_groups = dict()
+        group_offset = 1
+        sentinel = seq_re_main.SENTINEL if self._aligned else ''
+        self_aligned = True
+        for i, compiled in enumerate(self._compiled_list):
+            # noinspection PyProtectedMember
+            alternative = seq_re_main._translate(compiled._parser.pattern_stack,
+                                                 compiled._map_encode.__getitem__,
+                                                 group_prefix='_r%d_' % i,
+                                                 group_offset=group_offset,
+                                                 sentinel=sentinel,
+                                                 columns=self._columns)
+            alternative_list.append('(%s)' % alternative)
+            # noinspection PyProtectedMember
+            self_aligned = (self_aligned and
+                            seq_re_main._is_self_aligned(compiled._parser.get_structure()))
+            scanner_groups[group_offset] = i
+            group_offset += compiled.regex.groups + 1
+        # noinspection PyProtectedMember
+        scanner = re.compile(seq_re_main._align('|'.join(alternative_list), sentinel,
+                                                self_aligned))
+        return scanner, scanner_groups
+
+    @property
+    def len_tuple(self):
+        """The length of the tuple"""
+        return self._len_tuple
+
+    @property
+    def rule_ids(self):
+        """The ids of rules in order"""
+        return list(self._rule_ids)
+
+    def __len__(self):
+        return len(self._rule_ids)
+
+    def __getitem__(self, rule_id):
+        """Get the CompiledSeqPattern of a rule.
+
+        :param rule_id: The id of rule
+        :return: A CompiledSeqPattern Instance
+        """
+        return self._compiled_dict[rule_id]
+
+    def _encode_sequence(self, sequence):
+        """Encode the sequence once for all rules sharing the vocabulary"""
+        for i, compiled in enumerate(self._compiled_list):
+            if i not in self._private_indices:
+                # noinspection PyProtectedMember
+                return compiled._encode_sequence(sequence)
+        return ''
+
+    def finditer(self, sequence):
+        """Return an iterator yielding (rule_id, SeqMatchObject)
+        over all non-overlapping matches of every rule over the sequence of tuples.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: An iterator which generates (rule_id, SeqMatchObject Instance)
+        """
+        length = len(sequence)
+        if length < self._min_width:
+            return
+        regex_string = None
+        for i in self._route(seq_re_main.token_set(sequence)):
+            rule_id = self._rule_ids[i]
+            compiled = self._compiled_list[i]
+            if length < compiled.min_width:
+                continue
+            if i in self._private_indices:
+                for match_object in compiled.finditer(sequence):
+                    yield rule_id, match_object
+            else:
+                if regex_string is None:
+                    # encoded once for the rules routed, and never for a short sequence
+                    regex_string = self._encode_sequence(sequence)
+                for match in compiled.regex.finditer(regex_string):
+                    # noinspection PyProtectedMember
+                    yield rule_id, compiled._match_object(match, sequence)
+
+    def findall(self, sequence):
+        """Similar to the finditer() function.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: A list of (rule_id, SeqMatchObject Instance)
+        """
+        return list(self.finditer(sequence))
+
+    def scan(self, sequence):
+        """Return an iterator yielding (rule_id, SeqMatchObject)
+        over all non-overlapping matches among all rules in one pass,
+        and the rule listed earlier wins if several rules match at the same position.
+
+        :param sequence: A 2-dimensional Sequence (or the sequence of tuples)
+        :return: An iterator which generates (rule_id, SeqMatchObject Instance)
+        """
+        if self._private_indices:
+            raise ValueError('back references are not supported by scan()')
+        if self._scanner is None or len(sequence) < self._min_width:
+            return
+        regex_string = self._encode_sequence(sequence)
+        for match in self._scanner.finditer(regex_string):
+            # the group of the alternative is closed last
+            group_offset = match.lastindex
+            i = self._scanner_groups[group_offset]
+            # noinspection PyProtectedMember
+            yield (self._rule_ids[i],
+                   self._compiled_list[i]._match_object(match, sequence, group_offset))
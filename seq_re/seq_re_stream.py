@@ -0,0 +1,134 @@
+# coding:utf-8
+
+"""
+Match a stream of tuples in bounded windows
+===========================================
+
+CompiledSeqPattern.finditer() encodes the whole sequence into one string,
+which does not fit a document of millions of tuples, or the output of a tagger as a stream.
+finditer_stream() reads the tuples from an iterator, and encodes and matches them
+window by window, in which the tail of the previous window is kept
+as long as the widest match of the pattern (see also SeqRegexParser.get_width()),
+so that each match is found exactly once, and located by the global tuple indices.
+
+>>> import seq_re
+>>> compiled = seq_re.SeqRegex(2).compile('[;nc] .{0,3} [保荐|担任]')
+>>> for match in seq_re.finditer_stream(compiled, iter_tuples(document), window=4096):
+>>>     print(match.span())
+
+The matches are the same as the ones of compiled.finditer() over the whole sequence,
+but a pattern with the unbounded quantifiers `*` `+` `{m,}` requires the argument ``cap``,
+by which they repeat ``cap`` times at most, e.g. `[;n]+` is matched as `[;n]{1,cap}`.
+
+"""
+
+__author__ = "GE Ning <https://github.com/gening/seq_re>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+__license__ = "LGPL-3.0"
+__version__ = "1.0"
+
+import itertools
+
+DEFAULT_WINDOW = 4096
+
+
+class _WindowView(object):
+    """The tuples of a match kept from a window, which are located by the global indices."""
+
+    __slots__ = ('_tuples', '_offset')
+
+    def __init__(self, tuples, offset):
+        self._tuples = tuples
+        self._offset = offset
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.start is None or index.start < 0:
+                # the group did not participate in the match
+                return []
+            return self._tuples[index.start - self._offset:index.stop - self._offset]
+        return self._tuples[index - self._offset]
+
+
+def finditer_stream(compiled, tuples, window=DEFAULT_WINDOW, cap=None):
+    """
+    Return an iterator yielding SeqMatchObject instances
+    over all non-overlapping matches for the compiled pattern over a stream of tuples,
+    in which the spans of groups are the global tuple indices in the stream.
+
+    :param compiled: The CompiledSeqPattern object
+    :param tuples: An iterable of tuples
+    :param window: The number of tuples read at a time
+    :param cap: The max number of repeats of the unbounded quantifiers, 1 at least,
+                which is required if the pattern is unbounded
+    :return: An iterator which generates a SeqMatchObject Instance
+    """
+    if window < 1:
+        raise ValueError('invalid size of the window')
+    if cap is not None and cap < 1:
+        # `+` repeats once at least, which the width must count
+        raise ValueError('invalid cap of the unbounded quantifiers')
+    # noinspection PyProtectedMember
+    parser = compiled._parser
+    _, max_width = parser.get_width(cap, lookaround=True)
+    if max_width is None:
+        raise ValueError('the width of the pattern is unbounded, and a cap is required')
+    if cap is not None:
+        # noinspection PyProtectedMember
+        compiled = compiled._cap(cap)
+    # noinspection PyProtectedMember
+    stride = compiled._stride
+    # noinspection PyProtectedMember
+    encode = compiled._encode_sequence
+    # noinspection PyProtectedMember
+    match_object = compiled._match_object
+    regex_finditer = compiled.regex.finditer
+    # a match starting at a tuple is decided by the tuples up to `reach` after it,
+    # including the end of string, and the one across a tuple if not aligned
+    reach = max_width + 2
+    # the tuples before the next search are kept for the lookbehind assertions,
+    # and one at least to prevent `^` from matching at the start of window
+    behind = max_width + 1
+    iterator = iter(tuples)
+    buffer = []
+    base = 0  # the global index of buffer[0]
+    pos = 0  # the global index of char where the next search starts
+    last_empty = False  # whether the last match is empty and ends at pos
+    final = False
+    while not final:
+        chunk = list(itertools.islice(iterator, window))
+        final = len(chunk) < window
+        buffer.extend(chunk)
+        buffer_end = base + len(buffer)
+        char_base = base * stride
+        matches = regex_finditer(encode(buffer), pos - char_base)
+        first = True
+        for match in matches:
+            start, end = match.span()
+            start += char_base
+            end += char_base
+            if first and last_empty and start == end == pos:
+                # it has been found at the end of the previous window
+                first = False
+                continue
+            first = False
+            if not final and start // stride + reach >= buffer_end:
+                # decided by the tuples not read yet, and so are the earlier starts near the end
+                break
+            # keep the tuples of all groups, which may be out of the entire match
+            group_spans = [span for span in match.regs if span[0] >= 0]
+            low = min(span[0] for span in group_spans) // stride
+            high = -(-max(span[1] for span in group_spans) // stride)
+            view = _WindowView(buffer[low:high], base + low)
+            yield match_object(match, view, base=-char_base)
+            pos = end
+            last_empty = start == end
+        # no more match starts before the tuples which may be changed by the ones not read yet
+        searched = (buffer_end - reach) * stride
+        if searched > pos:
+            pos = searched
+            last_empty = False
+        # drop the tuples not looked at any more
+        keep = max(base, pos // stride - behind)
+        del buffer[:keep - base]
+        base = keep
@@ -76,7 +76,7 @@ setup(
 
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    packages=find_packages(exclude=['docs', 'tests'])  # 'contrib', 'docs', 'tests'
+    packages=find_packages(exclude=['docs', 'tests']),  # 'contrib', 'docs', 'tests'
 
     # Alternatively, if you want to distribute just a my_module.py, uncomment
     # this:
@@ -92,10 +92,9 @@ setup(
     # dependencies). You can install these using the following syntax,
     # for example:
     # $ pip install -e .[dev,test]
-    # extras_require={
-    #    'dev': ['check-manifest'],
-    #    'test': ['coverage'],
-    # },
+    extras_require={
+        'numpy': ['numpy'],
+    },
 
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+benchmark of the batch and fast-path APIs of seq_re, which is not a part of the unit test:
+
+python seq_re_benchmark.py
+
+"""
+from __future__ import print_function, division
+
+__author__ = "GE Ning <https://github.com/gening/seq_regex>"
+__copyright__ = "Copyright (C) 2017 GE Ning"
+
+import codecs
+import random
+import timeit
+
+import seq_re
+
+
+def load_corpus(ndim, count=20000, seed=0):
+    """Make a corpus of sequences of various lengths from the tuples of the test corpus."""
+    tuples = []
+    with codecs.open('seq_re_test_corpus.txt', 'r', encoding='utf-8') as f:
+        for line in f:
+            tuples.extend(tup for tup in (item.split('`') for item in line.split())
+                          if len(tup) == ndim)
+    rand = random.Random(seed)
+    return [[rand.choice(tuples) for _ in range(rand.randint(5, 40))] for _ in range(count)]
+
+
+def best_time(func):
+    return min(timeit.repeat(func, number=1, repeat=7))
+
+
+def benchmark_batch(ndim, sequences):
+    print('====batch matching====')
+    for pattern in ['[;nt]+ .{0,3} [;v|vn]', '[保荐] .{0,3} [;n]', '(?P<x>[;n]) [;v]']:
+        compiled = seq_re.SeqRegex(ndim).compile(pattern)
+        loop_time = best_time(lambda: [compiled.search(seq) for seq in sequences])
+        batch_time = best_time(lambda: list(compiled.search_many(sequences)))
+        print('%s\tloop over search: %.3fs\tsearch_many: %.3fs (x%.2f)'
+              % (pattern, loop_time, batch_time, loop_time / batch_time))
+        loop_time = best_time(lambda: [m for seq in sequences for m in compiled.finditer(seq)])
+        batch_time = best_time(lambda: list(compiled.finditer_many(sequences)))
+        concat_time = best_time(lambda: list(compiled.finditer_concat(sequences)))
+        print('%s\tloop over finditer: %.3fs\tfinditer_many: %.3fs (x%.2f)'
+              '\tfinditer_concat: %.3fs (x%.2f)'
+              % (pattern, loop_time, batch_time, loop_time / batch_time,
+                 concat_time, loop_time / concat_time))
+
+
+def benchmark_fast_paths(ndim, sequences):
+    print('====span-only and count-only matching====')
+    for pattern in ['[;n]', '(?P<a>[;nc]) (.{0,3}) (?P<b>[;v])', '[;v]*', '[;zzz]']:
+        compiled = seq_re.SeqRegex(ndim).compile(pattern)
+        findall_time = best_time(lambda: [compiled.findall(seq) for seq in sequences])
+        spans_time = best_time(lambda: [list(compiled.finditer_spans(seq)) for seq in sequences])
+        count_time = best_time(lambda: [compiled.count(seq) for seq in sequences])
+        contains_time = best_time(lambda: [compiled.contains(seq) for seq in sequences])
+        print('%s\tfindall: %.3fs\tfinditer_spans: %.3fs\tcount: %.3fs\tcontains: %.3fs'
+              % (pattern, findall_time, spans_time, count_time, contains_time))
+
+
+if __name__ == '__main__':
+    n = 2
+    corpus = load_corpus(n)
+    benchmark_batch(n, corpus)
+    benchmark_fast_paths(n, corpus)
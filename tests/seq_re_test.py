@@ -17,8 +17,14 @@ __copyright__ = "Copyright (C) 2017 GE Ning"
 import unicodedata
 
 import codecs
+import os
+import pickle
+import shutil
+import tempfile
 
 import seq_re
+from seq_re import seq_re_bootstrap
+from seq_re import seq_re_counter
 from seq_re import seq_re_parse
 
 
@@ -124,6 +130,35 @@ class TestSeqRegexParser:
                 # print('%s\t%s' % (pattern, e.message.split('\n')[0]))
                 assert e.message.split('\n')[0] == self.expectations[i]
 
+    def test_literal_formula(self):
+        print('====test literal formula====')
+        formula_class = seq_re_parse.Formula
+        self.sp.parse(self.ndim, '[a;b]+ [c]? ([d]|[e;;f]) (?![g])')
+        formula = self.sp.get_literal_formula()
+        assert formula == (formula_class.AND, (
+            (formula_class.IN, 0, frozenset(['a'])),
+            (formula_class.IN, 1, frozenset(['b'])),
+            (formula_class.OR, ((formula_class.IN, 0, frozenset(['d'])),
+                                (formula_class.AND, ((formula_class.IN, 0, frozenset(['e'])),
+                                                     (formula_class.IN, 2, frozenset(['f']))))))))
+        assert self.sp.get_required_literal_sets() == [frozenset(['a']), frozenset(['b'])]
+        assert formula_class.cover(formula) == frozenset(['a'])
+        assert formula_class.evaluate(formula, set(['a', 'b', 'd']))
+        assert not formula_class.evaluate(formula, set(['a', 'b', 'e', 'c']))
+        self.sp.parse(self.ndim, '[a]* | [b]')
+        assert self.sp.get_literal_formula() == formula_class.TRUE
+
+    def test_width(self):
+        print('====test width====')
+        for pattern, width in [('[a] [b]? [c]{2,3}', (3, 5)), ('[a]+ | [b] [c]', (1, None)),
+                               ('(?:[a] [b]|[c]){2} (?=[d] [e])', (2, 4)),
+                               ('(?P<x>[a] [b]?) (?P=x) [;n]', (2, 6))]:
+            self.sp.parse(self.ndim, pattern)
+            assert self.sp.get_width() == width
+        self.sp.parse(self.ndim, '[a]+ (?=[d] [e])')
+        assert self.sp.get_width(cap=4) == (1, 4)
+        assert self.sp.get_width(cap=4, lookaround=True) == (1, 6)
+
     def teardown(self):
         pass
 
@@ -222,6 +257,385 @@ class TestSeqRegex:
         assert True
         print('====end of SeqRegex example test====')
 
+    def test_compiled_pattern(self):
+        print('====begin of CompiledSeqPattern test====')
+        sr = seq_re.SeqRegex(self.ndim)
+        compiled = sr.compile('([;nc]) .{0,3} ([;v])')
+        assert isinstance(compiled, seq_re.CompiledSeqPattern)
+        try:
+            compiled._regex = None
+            assert False
+        except AttributeError:
+            pass
+        results = [compiled.findall(seq) for seq in self.tagged_lines]
+        # compiling another pattern by the same SeqRegex does not affect the compiled one
+        sr.findall('[;n]', self.tagged_lines[0])
+        for seq, matches in zip(self.tagged_lines, results):
+            assert ([m.group_list[0][2:] for m in compiled.finditer(seq)] ==
+                    [m.group_list[0][2:] for m in matches])
+        print('====end of CompiledSeqPattern test====')
+
+    def test_match_object(self):
+        print('====begin of SeqMatchObject test====')
+        compiled = seq_re.SeqRegex(self.ndim).compile('(?P<a>[;nc]) (.{0,3}) (?P<b>[;v])?')
+        for seq in self.tagged_lines:
+            for match in compiled.finditer(seq):
+                # the groups are sliced on demand
+                assert match.span('a') == match.span(1) == match.named_group_dict['a'][2:]
+                assert match.group('b') is match.group(3) is match.named_group_dict['b'][1]
+                assert [(i, match.group(i)) + match.span(i) for i in range(4)] == match.group_list
+        match = compiled.search(self.tagged_lines[0])
+        for group in [4, 'c']:
+            try:
+                match.span(group)
+                assert False
+            except IndexError:
+                pass
+        print('====end of SeqMatchObject test====')
+
+    def test_fast_paths(self):
+        print('====begin of span-only and count-only test====')
+        for pattern in ['[;n]', '(?P<a>[;nc]) (.{0,3}) (?P<b>[;v])', '[;v]*', '[;zzz]']:
+            compiled = seq_re.SeqRegex(self.ndim).compile(pattern)
+            for seq in self.tagged_lines:
+                matches = compiled.findall(seq)
+                assert list(compiled.finditer_spans(seq)) == [m.span() for m in matches]
+                assert compiled.count(seq) == len(matches)
+                assert compiled.contains(seq) == (len(matches) > 0)
+        print('====end of span-only and count-only test====')
+
+    def test_anchored(self):
+        print('====begin of anchored matching test====')
+        seq = [['a', 'n'], ['b', 'v'], ['a', 'n'], ['c', 'n']]
+        compiled = seq_re.SeqRegex(self.ndim).compile('[;n] [b]?')
+        assert compiled.match(seq).span() == (0, 2)
+        assert compiled.match(seq, 1) is None
+        assert compiled.match(seq, 2).span() == (2, 3)
+        assert compiled.fullmatch(seq) is None
+        assert compiled.fullmatch(seq, 0, 2).span() == (0, 2)
+        assert compiled.fullmatch(seq, 3).span() == (3, 4)
+        # the tuples beyond endpos are ignored, and `$` matches at endpos
+        assert seq_re.SeqRegex(self.ndim).compile('[b]$').match(seq, 1, 2).span() == (1, 2)
+        compiled = seq_re.SeqRegex(self.ndim).compile('([a]|[a] [b]) [;n]?')
+        assert compiled.match(seq).span() == (0, 1)
+        assert compiled.fullmatch(seq, 0, 3).span() == (0, 3)
+        print('====end of anchored matching test====')
+
+    def test_corpus_reader(self):
+        print('====begin of CorpusReader test====')
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'corpus.txt')
+            with codecs.open(path, 'w', encoding='utf-8') as f:
+                for seq in self.tagged_lines:
+                    f.write(' '.join('`'.join(tup) for tup in seq) + '\n')
+                    # a malformed line and a blank line
+                    f.write(u'中信证券`nc`x 保荐`v\n\n')
+            reader = seq_re.CorpusReader(path, self.ndim)
+            assert list(reader) == self.tagged_lines
+            assert tuple(reader.info()) == (2 * len(self.tagged_lines), len(self.tagged_lines),
+                                            len(self.tagged_lines))
+            # every line is read by exactly one shard
+            for count in (1, 2, 3, 7, 1000):
+                sequences = []
+                for start, end in reader.shards(count):
+                    sequences.extend(seq_re.CorpusReader(path, self.ndim).read(start, end))
+                assert sequences == self.tagged_lines
+        finally:
+            shutil.rmtree(temp_dir)
+        print('====end of CorpusReader test====')
+
+    def test_binary_corpus(self):
+        print('====begin of BinaryCorpus test====')
+        sequences = self.tagged_lines + [[]] + self.tagged_lines
+        temp_dir = tempfile.mkdtemp()
+        try:
+            corpus = seq_re.compile_corpus(sequences, os.path.join(temp_dir, 'a'), self.ndim)
+            assert len(corpus) == len(sequences)
+            assert list(corpus) == sequences
+            for use_numpy in [False, None]:
+                corpus = seq_re.BinaryCorpus(os.path.join(temp_dir, 'a'), use_numpy)
+                for pattern in ['[;n]+ [;v]?', '(?P<a@0>[;nc]) (.{0,3}) (?P<b@@>[;v])', '^[;zzz]?']:
+                    compiled = seq_re.SeqRegex(self.ndim).compile(pattern)
+                    expected = [(i, m.group_list) for i, m in compiled.finditer_many(sequences)]
+                    for batch_size in (1, 1000):
+                        assert ([(i, m.group_list)
+                                 for i, m in corpus.finditer(compiled, batch_size)] == expected)
+                corpus.close()
+            # the vocabulary is shared by another corpus
+            vocabulary = seq_re.Vocabulary.load(os.path.join(temp_dir, 'a', 'vocabulary.json'))
+            size = len(vocabulary)
+            other = seq_re.compile_corpus([[['zzz', 'yyy']]] + sequences,
+                                          os.path.join(temp_dir, 'b'), self.ndim, vocabulary)
+            assert len(other.vocabulary) == size + 2
+            element = sequences[0][0][0]
+            assert other.vocabulary.get(element) == corpus.vocabulary.get(element)
+            other.close()
+        finally:
+            shutil.rmtree(temp_dir)
+        print('====end of BinaryCorpus test====')
+
+    def test_corpus_index(self):
+        print('====begin of CorpusIndex test====')
+        sequences = [[['a', 'n'], ['b', 'v']], [['b', 'n']], [], [['c', 'v'], ['a', 'v']]]
+        temp_dir = tempfile.mkdtemp()
+        try:
+            seq_re.compile_corpus(sequences + self.tagged_lines, temp_dir, self.ndim)
+            for use_numpy in [False, None]:
+                corpus = seq_re.BinaryCorpus(temp_dir, use_numpy)
+                index = seq_re.build_index(corpus)
+                assert index.postings(0, 'a') == [(0, 0), (3, 1)]
+                assert index.postings(1, 'a') == []
+                compiled = seq_re.SeqRegex(self.ndim).compile('[a] [;v]')
+                assert index.candidates(compiled) == [0, 3]
+                compiled = seq_re.SeqRegex(self.ndim).compile('[a|c] ([;n]|[b])')
+                assert index.candidates(compiled) == [0]
+                assert index.candidates(seq_re.SeqRegex(self.ndim).compile('[;n]?')) is None
+                for pattern in ['[;n]+ [;v]?', '(?P<a@0>[;nc]) (.{0,3}) (?P<b@@>[;v])', '[a;^v]']:
+                    for aligned in (True, False):
+                        compiled = seq_re.SeqRegex(self.ndim, aligned).compile(pattern)
+                        assert ([(i, m.group_list) for i, m in index.finditer(compiled)] ==
+                                [(i, m.group_list) for i, m in corpus.finditer(compiled)])
+                index.close()
+                corpus.close()
+        finally:
+            shutil.rmtree(temp_dir)
+        print('====end of CorpusIndex test====')
+
+    def test_stream(self):
+        print('====begin of finditer_stream test====')
+        document = [n_tuple for seq in self.tagged_lines for n_tuple in seq]
+        for pattern in ['(?P<a@0>[;nc]) (.{0,3}) (?P<b@@>[;v])', '(?<=[;v])[;n] (?![;u])', '^.{2}']:
+            for aligned in (True, False):
+                compiled = seq_re.SeqRegex(self.ndim, aligned).compile(pattern)
+                expected = [m.group_list for m in compiled.finditer(document)]
+                for window in [1, 7, 4096]:
+                    assert ([m.group_list for m in
+                             seq_re.finditer_stream(compiled, iter(document), window)] == expected)
+        # a later start matches before the tuples of an earlier one are read
+        compiled = seq_re.SeqRegex(1).compile('[a] [b]? [c] | [b]')
+        for window in [1, 2, 3]:
+            matches = seq_re.finditer_stream(compiled, iter([['a'], ['b'], ['c']]), window)
+            assert [m.span() for m in matches] == [(0, 3)]
+        # the unbounded quantifiers repeat `cap` times at most
+        compiled = seq_re.SeqRegex(self.ndim).compile('[;n]+ [;v]*')
+        assert compiled.regex.pattern != compiled._cap(3).regex.pattern
+        try:
+            next(seq_re.finditer_stream(compiled, iter(document)))
+            assert False
+        except ValueError:
+            pass
+        expected = [m.span() for m in compiled._cap(3).finditer(document)]
+        matches = seq_re.finditer_stream(compiled, iter(document), 5, cap=3)
+        assert [m.span() for m in matches] == expected
+        # the smallest cap, and the matches across the boundaries of small windows
+        expected = [m.span() for m in compiled._cap(1).finditer(document)]
+        for window in [1, 2, 3]:
+            matches = seq_re.finditer_stream(compiled, iter(document), window, cap=1)
+            assert [m.span() for m in matches] == expected
+        try:
+            next(seq_re.finditer_stream(compiled, iter(document), 2, cap=0))
+            assert False
+        except ValueError:
+            pass
+        print('====end of finditer_stream test====')
+
+    def test_width(self):
+        print('====begin of min_width and max_width test====')
+        compiled = seq_re.SeqRegex(self.ndim).compile('(?P<a@0>[;nc]) (.{0,3}) (?P<b@@>[;v])+')
+        assert (compiled.min_width, compiled.max_width) == (2, None)
+        assert compiled._cap(2).max_width == 6
+        # the sequences shorter than min_width are skipped without encoding
+        seq = [[u'中信证券', 'nc']]
+        assert compiled.search(seq) is None and compiled.count(seq) == 0
+        assert compiled.match(self.tagged_lines[0], len(self.tagged_lines[0]) - 1) is None
+        assert compiled.is_useless_for(seq)
+        assert ([(i, m.group_list) for i, m in compiled.finditer_many([seq] + self.tagged_lines)]
+                == [(i + 1, m.group_list) for i, m in compiled.finditer_many(self.tagged_lines)])
+        sequences = [seq] + self.tagged_lines + [seq, []]
+        assert ([(i, m.group_list) for i, m in compiled.finditer_concat(sequences, 2)] ==
+                [(i, m.group_list) for i, m in compiled.finditer_many(sequences)])
+        pattern_set = seq_re.PatternSet(self.ndim, [('short', '[;nc]'), ('long', compiled.pattern)])
+        assert [rule_id for rule_id, _ in pattern_set.finditer(seq)] == ['short']
+        assert [rule_id for rule_id, _ in pattern_set.scan([])] == []
+        print('====end of min_width and max_width test====')
+
+    def test_template(self):
+        print('====begin of CompiledSeqTemplate test====')
+        pattern = '(?P<company@0>[;nc]) .{0,3} ([verb])'
+        template = seq_re.SeqRegex(self.ndim).compile_template(pattern, 'verb')
+        assert isinstance(template, seq_re.CompiledSeqTemplate)
+        for placeholder_dict in [{'verb': [u'保荐', u'担任']}, {'verb': u'担任'}, {}]:
+            bound = template.bind(**placeholder_dict)
+            compiled = seq_re.SeqRegex(self.ndim).compile(pattern, **placeholder_dict)
+            assert bound.required_literal_sets == compiled.required_literal_sets
+            for seq in self.tagged_lines:
+                assert bound.is_useless_for(seq) == compiled.is_useless_for(seq)
+                assert ([m.group_list for m in bound.finditer(seq)] ==
+                        [m.group_list for m in compiled.finditer(seq)])
+        # the RE object is shared unless a value is also a literal of the pattern
+        assert template.bind(verb=['x']).regex is template.bind(verb=['y']).regex
+        assert template.bind(verb=['nc']).regex is not template.bind(verb=['y']).regex
+        # the template is cached, so a new placeholder dict is compiled by binding
+        seq_re.purge()
+        seq_re.SeqRegex(self.ndim).compile(pattern, verb=['x'])
+        assert (seq_re.SeqRegex(self.ndim).compile(pattern, verb=['y']).regex is
+                seq_re.SeqRegex(self.ndim).compile_template(pattern, 'verb').bind().regex)
+        print('====end of CompiledSeqTemplate test====')
+
+    def test_pattern_set(self):
+        print('====begin of PatternSet test====')
+        rules = [('company', '[;nc]+', {}),
+                 ('action', '(?P<company@0>[;nc]) .{0,3} ([verb])', {'verb': [u'保荐', u'担任']}),
+                 ('repeat', '(?P<tag>[;v]) .{0,5} (?P=tag) [;n]', {})]
+        pattern_set = seq_re.PatternSet(self.ndim, rules)
+        assert len(pattern_set) == 3
+        for seq in self.tagged_lines:
+            expected = []
+            for rule_id, pattern, placeholder_dict in rules:
+                compiled = seq_re.SeqRegex(self.ndim).compile(pattern, **placeholder_dict)
+                expected.extend((rule_id, m.group_list) for m in compiled.finditer(seq))
+            assert [(rule_id, m.group_list) for rule_id, m in pattern_set.finditer(seq)] == expected
+        # route by the inverted index of required literals
+        pattern_set = seq_re.PatternSet(self.ndim, [('a', '[x] [;v]?'), ('b', '[x]|[y]'),
+                                                    ('c', '[;nc] [z|y]')])
+        assert pattern_set.candidates([['x', 'n']]) == ['a', 'b']
+        assert pattern_set.candidates([['y', 'nc']]) == ['b', 'c']
+        # one pass by the combined RE
+        pattern_set = seq_re.PatternSet(self.ndim, rules[:2])
+        for seq in self.tagged_lines:
+            for rule_id, match in pattern_set.scan(seq):
+                print(rule_id, match.group_list[0][2:])
+        print('====end of PatternSet test====')
+
+    def test_is_useless_for(self):
+        print('====begin of prefilter test====')
+        compiled = seq_re.SeqRegex(self.ndim).compile('[x] [;v]? [y|z]')
+        assert compiled.required_literal_sets == (frozenset(['x']), frozenset(['y', 'z']))
+        assert compiled.is_useless_for([['x', 'n'], ['w', 'v']])
+        assert not compiled.is_useless_for([['x', 'n'], ['z', 'n']])
+        assert compiled.is_useless_for(set(['x', 'v']))
+        assert not compiled.is_useless_for(set(['x', 'y']))
+        for seq in self.tagged_lines:
+            if compiled.is_useless_for(seq):
+                assert compiled.search(seq) is None
+        print('====end of prefilter test====')
+
+    def test_aligned(self):
+        print('====begin of aligned matching test====')
+        seq = [['x', 'a'], ['y', 'z'], ['a', 'b']]
+        # `a` in the 2nd element of the 1st tuple cannot start a match of `[a;^q]`
+        assert (seq_re.SeqRegex(2, aligned=False).compile('[a;^q]').search(seq).group_list[0][2:] !=
+                (2, 3))
+        assert seq_re.SeqRegex(2).compile('[a;^q]').search(seq).group_list[0][2:] == (2, 3)
+        # the empty matches are located at every boundary of tuples
+        assert ([m.group_list[0][2] for m in seq_re.SeqRegex(2).compile('[b]?').finditer(seq)] ==
+                [0, 1, 2, 3])
+        print('====end of aligned matching test====')
+
+    def test_projection(self):
+        print('====begin of column projection test====')
+        compiled = seq_re.SeqRegex(self.ndim).compile('(?P<c>[;nt]+) . [;v|vn]')
+        assert compiled.columns == (1,)
+        full = seq_re.SeqRegex(self.ndim).compile('(?P<c>[^zzz;nt]+) . [;v|vn]')
+        assert full.columns == (0, 1)
+        for seq in self.tagged_lines:
+            assert ([m.group_list for m in compiled.finditer(seq)] ==
+                    [m.group_list for m in full.finditer(seq)])
+        # a back reference compares the whole tuples
+        assert seq_re.SeqRegex(3).compile('(?P<x>[;;n]) (?P=x) [;n]').columns == (0, 1, 2)
+        # the rules of a set share the union of their columns
+        pattern_set = seq_re.PatternSet(3, [('a', '[;;nt]'), ('b', '[;vn]')])
+        assert pattern_set['a'].columns == pattern_set['b'].columns == (1, 2)
+        seq = [['x', 'vn', 'y'], ['x', 'y', 'nt']]
+        assert [rule_id for rule_id, _ in pattern_set.scan(seq)] == ['b', 'a']
+        print('====end of column projection test====')
+
+    def test_batch_encoder(self):
+        print('====begin of batch encoder test====')
+        compiled = seq_re.SeqRegex(self.ndim).compile('[;nt]+ . [;v|vn]')
+        sequences = self.tagged_lines[:50]
+        lengths = [len(seq) for seq in sequences]
+        columns = [[n_tuple[j] for seq in sequences for n_tuple in seq] for j in range(self.ndim)]
+        expected = [compiled._encode_sequence(seq) for seq in sequences]
+        for use_numpy in (None, False):
+            encoder = seq_re.BatchEncoder(compiled, use_numpy)
+            assert encoder.split(encoder.encode_columns(columns), lengths) == expected
+        print('====end of batch encoder test====')
+
+    def test_batch(self):
+        print('====begin of batch matching test====')
+        sequences = self.tagged_lines * 2000
+        for pattern in ['[;nt]+ .{0,3} [;v|vn]', '[保荐] .{0,3} [;n]', '(?P<x>[;n]) [;v]']:
+            compiled = seq_re.SeqRegex(self.ndim).compile(pattern)
+            expected = [(i, m.group_list) for i, seq in enumerate(sequences)
+                        for m in compiled.finditer(seq)]
+            assert [(i, m.group_list) for i, m in compiled.finditer_many(sequences)] == expected
+            assert [(i, m.group_list) for i, m in compiled.finditer_concat(sequences)] == expected
+            expected = [(i, m.group_list) for i, seq in enumerate(sequences)
+                        for m in [compiled.search(seq)] if m is not None]
+            assert [(i, m.group_list) for i, m in compiled.search_many(sequences)] == expected
+        # the anchors and the negative sets are local to each sequence
+        sequences = [[['a', 'x'], ['b', 'y']], [], [['b', 'x']], [['a', 'y'], ['c', 'x']]]
+        for pattern in ['^[a]', '[b]$', '[^a]+$', '[c]?', '(?<![a])[b|c]', '[a](?![b])']:
+            for aligned in (True, False):
+                compiled = seq_re.SeqRegex(self.ndim, aligned).compile(pattern)
+                expected = [(i, m.group_list) for i, seq in enumerate(sequences)
+                            for m in compiled.finditer(seq)]
+                for batch_size in (1, 3, 100):
+                    assert [(i, m.group_list)
+                            for i, m in compiled.finditer_concat(sequences, batch_size)] == expected
+        print('====end of batch matching test====')
+
+    def test_parallel(self):
+        print('====begin of parallel matching test====')
+        compiled = seq_re.SeqRegex(self.ndim).compile('(?P<c>[;nc]) .{0,3} ([;v])')
+        clone = pickle.loads(pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL))
+        assert clone.regex.pattern == compiled.regex.pattern
+        sequences = self.tagged_lines * 100 + [[['x', 'nc'], ['y', 'v']]] * 100
+        expected = [(i, tuple(group[2:] for group in m.group_list))
+                    for i, seq in enumerate(sequences) for m in clone.finditer(seq)]
+        assert list(seq_re.parallel_finditer(compiled, sequences, workers=1)) == expected
+        assert list(seq_re.parallel_finditer(compiled, sequences, workers=2,
+                                             chunksize=7)) == expected
+        assert sorted(seq_re.parallel_finditer(compiled, sequences, workers=2, chunksize=7,
+                                               ordered=False)) == expected
+        print('====end of parallel matching test====')
+
+    def test_cache(self):
+        print('====begin of SeqRegex cache test====')
+        pattern = '[;n]+ [verb]?'
+        seq_re.purge()
+        seq_re.SeqRegex(self.ndim).compile(pattern, verb=['v', 'vn'])
+        seq_re.SeqRegex(self.ndim).compile(pattern, verb=['v', 'vn'])
+        seq_re.SeqRegex(self.ndim).compile(pattern, verb=['v'])
+        info = seq_re.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+        seq_re.set_cache_size(1)
+        assert seq_re.cache_info().currsize == 1
+        seq_re.set_cache_size(512)
+        seq_re.purge()
+        assert seq_re.cache_info().currsize == 0
+        print('====end of SeqRegex cache test====')
+
+    def test_counter(self):
+        print('====begin of counter test====')
+        stream = ['a'] * 50 + ['b', 'c', 'd'] * 10 + ['a', 'e'] * 20 + ['f', 'g', 'h', 'i']
+        exact = seq_re_counter.ExactCounter()
+        counter = seq_re_counter.SpaceSavingCounter.for_error(0.1)
+        for item in stream:
+            exact.add(item)
+            counter.add(item)
+        assert counter.capacity == 10 and len(counter) <= 10
+        assert exact.most_common(1) == counter.most_common(1) == [('a', 70)]
+        freqs = dict(exact.items())
+        for item, freq in counter.items():
+            assert 0 <= freq - freqs[item] <= counter.error(item) <= counter.error_bound
+        # the patterns more frequent than the error bound are always kept
+        kept = set(item for item, _ in counter.items())
+        assert all(item in kept for item, freq in freqs.items() if freq > counter.error_bound)
+        print('====end of counter test====')
+
     # noinspection PyCompatibility
     def test_seq_re_bootstrap(self):
         print('====begin of bootstrap test====')
@@ -243,7 +657,72 @@ class TestSeqRegex:
         for gen_pattern, freq in result:
             print(freq, gen_pattern, sep='\t')
 
-        assert True
+        # the triggers are routed by the values of placeholders, not by the literal `v`
+        # noinspection PyProtectedMember
+        _, index, unindexed = seq_re_bootstrap._prepare(self.ndim, trigger_pattern,
+                                                        trigger_dict_list)
+        assert index == {u'中信证券': [0], u'中信证券股份有限公司': [1]} and unindexed == []
+
+        # the sharded counting is identical to the serial one
+        sequences = [seq[i:] + seq[:i] for seq in self.tagged_lines for i in range(len(seq))] * 3
+        result = seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list, sequences)
+        assert len(result) > 0
+        assert seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list, sequences,
+                                workers=2, chunksize=5) == result
+        # the heavy hitters in a bounded memory
+        snapshots = []
+        top = seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list, sequences,
+                               chunksize=5, capacity=1, top_k=1, snapshot_interval=10,
+                               snapshot_callback=lambda n, t: snapshots.append((n, t)))
+        assert top == result[:1]
+        assert [n for n, _ in snapshots] == list(range(10, len(sequences) + 1, 10))
+        assert all(len(snapshot) == 1 for _, snapshot in snapshots)
+
+        # resume from the checkpoint
+        def interrupted(stop):
+            for i, seq in enumerate(sequences):
+                if i == stop:
+                    raise KeyboardInterrupt
+                yield seq
+        temp_dir = tempfile.mkdtemp()
+        try:
+            checkpoint_path = os.path.join(temp_dir, 'bootstrap.json')
+            for capacity in (None, 3):
+                expected = seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list,
+                                            sequences, chunksize=5, capacity=capacity)
+                try:
+                    seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list,
+                                     interrupted(42), chunksize=5, capacity=capacity,
+                                     checkpoint_path=checkpoint_path, checkpoint_interval=10)
+                except KeyboardInterrupt:
+                    pass
+                assert os.path.exists(checkpoint_path)
+                assert seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list,
+                                        interrupted(None), chunksize=5, capacity=capacity,
+                                        checkpoint_path=checkpoint_path) == expected
+                # the checkpoint of a completed run is removed
+                assert not os.path.exists(checkpoint_path)
+            # another trigger setup
+            try:
+                seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list, interrupted(42),
+                                 chunksize=5, checkpoint_path=checkpoint_path,
+                                 checkpoint_interval=10)
+            except KeyboardInterrupt:
+                pass
+            try:
+                seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list[:1], sequences,
+                                 checkpoint_path=checkpoint_path)
+                assert False
+            except ValueError:
+                pass
+        finally:
+            shutil.rmtree(temp_dir)
+        # fold a new slice into the result counted before
+        half = len(sequences) // 2
+        result_before = seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list,
+                                         sequences[:half])
+        assert sorted(seq_re.bootstrap(self.ndim, trigger_pattern, trigger_dict_list,
+                                       sequences[half:], initial=result_before)) == sorted(result)
         print('====end of bootstrap test====')
 
 